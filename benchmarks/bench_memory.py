@@ -0,0 +1,143 @@
+"""Memory used by parsed shifts and the archived calendar, per 100k shifts.
+
+Compares the slotted, interned ShiftEvent against a plain frozen dataclass
+holding per-shift string copies (the previous layout), and EventArchive
+against the old {uid: [line, ...]} archive representation.
+
+    python benchmarks/bench_memory.py [shift_count]
+"""
+
+import datetime as dt
+import json
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scraper  # noqa: E402
+
+
+@dataclass(frozen=True)
+class LegacyShiftEvent:
+    shift_id: str
+    staff_member_id: str
+    staff_name: str
+    role_name: str
+    jobs: tuple[str, ...]
+    breaks_display: tuple[str, ...]
+    start: dt.datetime
+    end: dt.datetime
+    break_minutes: int = 0
+
+
+def legacy_load_existing_events(path: Path) -> dict[str, list[str]]:
+    text = path.read_text(encoding="utf-8")
+    raw_lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    events: dict[str, list[str]] = {}
+    in_event = False
+    current: list[str] = []
+    uid: str | None = None
+    for line in raw_lines:
+        if line == "BEGIN:VEVENT":
+            in_event = True
+            current = ["BEGIN:VEVENT"]
+            uid = None
+        elif line == "END:VEVENT" and in_event:
+            current.append("END:VEVENT")
+            if uid:
+                events[uid] = current
+            in_event = False
+            current = []
+        elif in_event:
+            current.append(line)
+            if line.startswith("UID:"):
+                uid = line[4:]
+    return events
+
+
+def legacy_extract_shifts(payload: dict) -> list[LegacyShiftEvent]:
+    shifts = []
+    for item in payload["rosteredShifts"]:
+        start = dt.datetime.fromisoformat(item["clockinTime"])
+        end = dt.datetime.fromisoformat(item["clockoutTime"])
+        shifts.append(
+            LegacyShiftEvent(
+                shift_id=item["id"],
+                staff_member_id=item["staffMemberId"],
+                staff_name=scraper.DEFAULT_EMPLOYEE_NAME,
+                role_name=(item.get("roleName") or "").strip(),
+                jobs=scraper.parse_jobs(item.get("jobs")),
+                breaks_display=scraper.format_shift_breaks(item, start),
+                start=start,
+                end=end,
+                break_minutes=scraper.shift_break_minutes(item, start),
+            )
+        )
+    return shifts
+
+
+def synthetic_payload(count: int) -> dict:
+    tz = dt.timezone(dt.timedelta(hours=13))
+    base = dt.datetime(2024, 1, 1, 17, 0, tzinfo=tz)
+    shifts = []
+    for index in range(count):
+        start = base + dt.timedelta(hours=6 * index)
+        shifts.append({
+            "id": f"shift-{index:07d}",
+            "staffMemberId": "staff-0",
+            "roleName": ("FOH", "Manager", "Admin")[index % 3],
+            "jobs": json.dumps(["Floor", "Close"]) if index % 2 else None,
+            "clockinTime": start.isoformat(),
+            "clockoutTime": (start + dt.timedelta(hours=4)).isoformat(),
+            "breaks": [{"durationMinutes": 30}],
+        })
+    # Round-trip through JSON so every string is a separate object, as from the API
+    return json.loads(json.dumps({
+        "staff": [{"id": "staff-0", "name": scraper.DEFAULT_EMPLOYEE_NAME}],
+        "rosteredShifts": shifts,
+        "roles": [],
+        "leaveRequests": [],
+    }))
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return result, size
+
+
+def main() -> int:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    scale = 100_000 / count
+    payload = synthetic_payload(count)
+
+    shifts, slotted = measure(lambda: scraper.extract_employee_shifts(payload, scraper.DEFAULT_EMPLOYEE_NAME))
+    _, legacy = measure(lambda: legacy_extract_shifts(payload))
+
+    calendar_text = scraper.render_calendar(
+        shifts, "Chou Chou", payload, "staff-0", generated_at=dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc)
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "roster.ics"
+        path.write_text(calendar_text, encoding="utf-8", newline="")
+        _, archive_old = measure(lambda: legacy_load_existing_events(path))
+        _, archive_new = measure(lambda: scraper.EventArchive.load(path))
+
+    def mib(value: float) -> str:
+        return f"{value * scale / (1024 * 1024):8.1f} MiB"
+
+    print(f"Per 100k shifts (measured with {count} shifts):")
+    print(f"  ShiftEvent records  legacy {mib(legacy)}  slotted+interned {mib(slotted)}")
+    print(f"  Archived events     legacy {mib(archive_old)}  EventArchive     {mib(archive_new)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,294 @@
+"""Local stand-in for the Loaded public roster API.
+
+Serves ``/time-roster-public/preferences`` and ``/time-roster-public`` from
+synthetic data or recorded responses, so the scraper's fetch path can be
+exercised offline:
+
+    python fake_loaded_api.py --port 8765 --latency 0.2 --error-rate 0.1
+    ROSTER_API_BASE_URL=http://127.0.0.1:8765/api python scraper.py
+
+With ``--record-upstream https://loadedhub.com/api --recordings rec/`` every
+request is forwarded to the real API and the response saved under ``rec/``;
+``--recordings rec/`` on its own replays them.
+"""
+
+import argparse
+import datetime as dt
+import hashlib
+import json
+import random
+import ssl
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.error import HTTPError, URLError
+from urllib.parse import parse_qsl, urlencode, urlparse
+from urllib.request import Request, urlopen
+
+import certifi
+from zoneinfo import ZoneInfo
+
+import scraper
+
+API_PREFIX = "/api"
+PREFERENCES_PATH = "/time-roster-public/preferences"
+ROSTER_PATH = "/time-roster-public"
+SYNTHETIC_ROLES = (
+    ("role-foh", "FOH"),
+    ("role-mgr", "Manager"),
+    ("role-admin", "Admin"),
+    ("role-kitchen", "Kitchen"),
+)
+SYNTHETIC_PREFERENCES = {
+    "weekStart": 1,
+    "dayStart": "05:00:00",
+    "localeTimeZone": "Pacific/Auckland",
+    "companyName": "Chou Chou",
+}
+
+
+@dataclass(frozen=True)
+class FakeApiConfig:
+    latency: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    staff_count: int = 20
+    shifts_per_day: int = 10
+    recordings: Path | None = None
+    record_upstream: str | None = None
+    seed: int = 0
+
+
+def recording_key(path: str, params: dict[str, str]) -> str:
+    endpoint = path.strip("/").replace("/", "-") or "root"
+    query = urlencode(sorted((k, v) for k, v in params.items() if k != "token"))
+    digest = hashlib.sha256(query.encode("utf-8")).hexdigest()[:16]
+    return f"{endpoint}--{digest}.json"
+
+
+def synthetic_roster(params: dict[str, str], config: FakeApiConfig) -> dict[str, Any]:
+    """Deterministic roster covering the requested window; the first staff member is the default employee."""
+    tz = ZoneInfo(SYNTHETIC_PREFERENCES["localeTimeZone"])
+    try:
+        start = dt.datetime.fromisoformat(params["startTime"]).astimezone(tz)
+        end = dt.datetime.fromisoformat(params["endTime"]).astimezone(tz)
+    except (KeyError, ValueError):
+        start = dt.datetime.now(tz)
+        end = start + dt.timedelta(days=7)
+
+    staff = [{"id": "staff-0", "name": scraper.DEFAULT_EMPLOYEE_NAME, "showInRoster": True, "datestampDeleted": None}]
+    for index in range(1, max(1, config.staff_count)):
+        staff.append({"id": f"staff-{index}", "name": f"Staff Member {index}", "showInRoster": True, "datestampDeleted": None})
+
+    shifts: list[dict[str, Any]] = []
+    day = start.date()
+    while day < end.date() or (day == end.date() and end.time() > dt.time(0)):
+        rng = random.Random(config.seed * 1_000_003 + day.toordinal())
+        for slot in range(config.shifts_per_day):
+            member = staff[(day.toordinal() + slot) % len(staff)]
+            role_id, role_name = SYNTHETIC_ROLES[slot % len(SYNTHETIC_ROLES)]
+            shift_start = dt.datetime.combine(day, dt.time(10 + rng.randrange(0, 8)), tzinfo=tz)
+            shift_end = shift_start + dt.timedelta(hours=rng.choice((3, 4, 5, 6, 8)))
+            if not (shift_start < end and shift_end > start):
+                continue
+            breaks = []
+            if shift_end - shift_start >= dt.timedelta(hours=5):
+                break_start = shift_start + dt.timedelta(hours=3)
+                breaks.append({
+                    "startTime": break_start.isoformat(),
+                    "endTime": (break_start + dt.timedelta(minutes=30)).isoformat(),
+                })
+            shifts.append({
+                "id": f"shift-{day:%Y%m%d}-{slot}",
+                "staffMemberId": member["id"],
+                "roleId": role_id,
+                "roleName": role_name,
+                "jobs": None,
+                "clockinTime": shift_start.isoformat(),
+                "clockoutTime": shift_end.isoformat(),
+                "breaks": breaks,
+            })
+        day += dt.timedelta(days=1)
+
+    return {
+        "rosteredShifts": shifts,
+        "staff": staff,
+        "roles": [{"id": role_id, "name": name, "datestampDeleted": None} for role_id, name in SYNTHETIC_ROLES],
+        "leaveRequests": [],
+    }
+
+
+class FakeLoadedHandler(BaseHTTPRequestHandler):
+    server: "FakeLoadedHTTPServer"
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        path = parsed.path
+        if path.startswith(API_PREFIX):
+            path = path[len(API_PREFIX):]
+        params = dict(parse_qsl(parsed.query))
+        config = self.server.config
+
+        if config.latency > 0:
+            time.sleep(config.latency)
+
+        roll = self.server.roll()
+        if roll < config.throttle_rate:
+            self._send(429, {"message": "Too Many Requests"}, headers={"Retry-After": "1"})
+            return
+        if roll < config.throttle_rate + config.error_rate:
+            self._send(500, {"message": "Injected failure"})
+            return
+
+        if path not in (PREFERENCES_PATH, ROSTER_PATH):
+            self._send(404, {"message": f"Unknown path {path}"})
+            return
+
+        if config.record_upstream:
+            status, body = self._forward(config.record_upstream, path, parsed.query)
+            if status == 200 and config.recordings is not None:
+                config.recordings.mkdir(parents=True, exist_ok=True)
+                (config.recordings / recording_key(path, params)).write_bytes(body)
+            self._send_bytes(status, body)
+            return
+
+        if config.recordings is not None:
+            recorded = self._replay(config.recordings, path, params)
+            if recorded is not None:
+                self._send_bytes(200, recorded)
+                return
+
+        if path == PREFERENCES_PATH:
+            self._send(200, SYNTHETIC_PREFERENCES)
+        else:
+            self._send(200, synthetic_roster(params, config))
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _forward(self, upstream: str, path: str, query: str) -> tuple[int, bytes]:
+        request = Request(
+            f"{upstream.rstrip('/')}{path}?{query}",
+            headers={"User-Agent": "roster-scraper/2.0", "Accept": "application/json"},
+        )
+        ssl_context = ssl.create_default_context(cafile=certifi.where())
+        try:
+            with urlopen(request, timeout=30, context=ssl_context) as response:
+                return response.status, response.read()
+        except HTTPError as exc:
+            return exc.code, exc.read()
+        except URLError as exc:
+            return 502, json.dumps({"message": f"Upstream unreachable: {exc.reason}"}).encode("utf-8")
+
+    def _replay(self, recordings: Path, path: str, params: dict[str, str]) -> bytes | None:
+        exact = recordings / recording_key(path, params)
+        if exact.exists():
+            return exact.read_bytes()
+        # Windows move every day, so fall back to the newest recording of the same endpoint
+        prefix = recording_key(path, params).split("--", 1)[0]
+        candidates = sorted(recordings.glob(f"{prefix}--*.json"), key=lambda item: item.stat().st_mtime)
+        if candidates:
+            return candidates[-1].read_bytes()
+        return None
+
+    def _send(self, status: int, payload: dict[str, Any], headers: dict[str, str] | None = None) -> None:
+        self._send_bytes(status, json.dumps(payload).encode("utf-8"), headers)
+
+    def _send_bytes(self, status: int, body: bytes, headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeLoadedHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: FakeApiConfig, verbose: bool = False) -> None:
+        super().__init__(address, FakeLoadedHandler)
+        self.config = config
+        self.verbose = verbose
+        self._rng = random.Random(config.seed)
+        self._rng_lock = threading.Lock()
+
+    def roll(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+
+class FakeLoadedServer:
+    """Runs the fake API on a background thread; usable as a context manager in tests."""
+
+    def __init__(self, config: FakeApiConfig | None = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.httpd = FakeLoadedHTTPServer((host, port), config or FakeApiConfig())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self) -> "FakeLoadedServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeLoadedServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local stand-in for the Loaded public roster API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before each response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--staff", type=int, default=20, help="synthetic staff count")
+    parser.add_argument("--shifts-per-day", type=int, default=10, help="synthetic shifts per day")
+    parser.add_argument("--recordings", type=Path, help="directory of recorded responses to replay or write")
+    parser.add_argument("--record-upstream", help="forward requests to this API base URL and record responses")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    config = FakeApiConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        staff_count=args.staff,
+        shifts_per_day=args.shifts_per_day,
+        recordings=args.recordings,
+        record_upstream=args.record_upstream,
+        seed=args.seed,
+    )
+    httpd = FakeLoadedHTTPServer((args.host, args.port), config, verbose=args.verbose)
+    host, port = httpd.server_address[:2]
+    print(f"Serving fake Loaded API at http://{host}:{port}{API_PREFIX}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
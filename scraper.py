@@ -1,14 +1,22 @@
+import bisect
+import csv
 import datetime as dt
+import gzip
 import hashlib
+import io
 import json
 import os
 import re
 import sys
 import time
 import ssl
+import threading
+from array import array
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO
 from urllib.error import HTTPError, URLError
 from urllib.parse import urlencode, urlparse
 from urllib.request import Request, urlopen
@@ -16,7 +24,8 @@ from urllib.request import Request, urlopen
 import certifi
 from zoneinfo import ZoneInfo
 
-API_BASE_URL = "https://loadedhub.com/api"
+DEFAULT_API_BASE_URL = "https://loadedhub.com/api"
+API_BASE_URL = os.environ.get("ROSTER_API_BASE_URL", "").strip().rstrip("/") or DEFAULT_API_BASE_URL
 DEFAULT_EMPLOYEE_NAME = "Cristian Rus"
 DEFAULT_WEEKS_AHEAD = 4
 DEFAULT_PUBLIC_ROSTER_URL = (
@@ -26,14 +35,29 @@ DEFAULT_PUBLIC_ROSTER_URL = (
 )
 OUTPUT_PATH = Path("roster.ics")
 SUMMARY_PATH = Path("roster_summary.txt")
+HOURS_PATH = Path("roster_hours.txt")
+OVERLAP_CSV_NAME = "coworker_overlap.csv"
+OVERLAP_JSON_NAME = "coworker_overlap.json"
+RENDER_CACHE_PATH = Path(".roster_render_cache.json")
+RENDER_CACHE_VERSION = 2
+BACKFILL_STATE_PATH = Path(".roster_backfill.json")
+HOURS_STORE_PATH = Path(".roster_hours_history.json")
+HOURS_HISTORY = dt.timedelta(weeks=53)
+PREFERENCES_CACHE_PATH = Path(".roster_preferences.json")
+PREFERENCES_CACHE_TTL = dt.timedelta(days=7)
 PUBLIC_DIR = Path("public")
 PUBLIC_OUTPUT_PATH = PUBLIC_DIR / "roster.ics"
 PUBLIC_INDEX_PATH = PUBLIC_DIR / "index.html"
 PUBLIC_NOJEKYLL_PATH = PUBLIC_DIR / ".nojekyll"
+PUBLIC_JSON_PATH = PUBLIC_DIR / "roster.json"
+PUBLIC_CSV_PATH = PUBLIC_DIR / "roster.csv"
+EXPORT_FORMATS = frozenset({"ics", "json", "csv"})
 LOCATION = "1 Taranaki Street, Te Aro, Wellington, 6011"
 COWORKER_ALLOWED_ROLES = frozenset({"admin", "foh", "manager"})
 CALENDAR_NAME = "Cristian Rus Roster"
 PRODID = "-//roster-scraper//Cristian Rus Roster//EN"
+NIGHT_START = dt.time(22, 0)
+NIGHT_END = dt.time(6, 0)
 
 
 class ScraperError(RuntimeError):
@@ -46,7 +70,7 @@ class PublicRosterConfig:
     token: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ShiftEvent:
     shift_id: str
     staff_member_id: str
@@ -56,6 +80,7 @@ class ShiftEvent:
     breaks_display: tuple[str, ...]
     start: dt.datetime
     end: dt.datetime
+    break_minutes: int = 0
 
 
 @dataclass(frozen=True)
@@ -91,6 +116,17 @@ def load_settings() -> tuple[str, str, int, int]:
     return public_roster_url, employee_name, weeks_ahead, weeks_back
 
 
+def load_export_formats() -> frozenset[str]:
+    raw = os.environ.get("ROSTER_EXPORT_FORMATS", ",".join(sorted(EXPORT_FORMATS)))
+    formats = frozenset(part.strip().lower() for part in raw.split(",") if part.strip())
+    unknown = formats - EXPORT_FORMATS
+    if unknown:
+        raise ScraperError(
+            f"ROSTER_EXPORT_FORMATS has unknown format(s) {sorted(unknown)}; choose from {sorted(EXPORT_FORMATS)}"
+        )
+    return formats
+
+
 def parse_public_roster_url(public_roster_url: str) -> PublicRosterConfig:
     fragment = urlparse(public_roster_url).fragment
     match = re.fullmatch(r"/roster/([^/]+)/([^/?#]+)", fragment)
@@ -102,8 +138,14 @@ def parse_public_roster_url(public_roster_url: str) -> PublicRosterConfig:
     return PublicRosterConfig(company_id=match.group(1), token=match.group(2))
 
 
-def http_get_json(path: str, params: dict[str, Any], retries: int = 3, timeout: int = 30) -> dict[str, Any]:
-    url = f"{API_BASE_URL}{path}?{urlencode(params)}"
+def http_get_json(
+    path: str,
+    params: dict[str, Any],
+    retries: int = 3,
+    timeout: int = 30,
+    base_url: str | None = None,
+) -> dict[str, Any]:
+    url = f"{base_url or API_BASE_URL}{path}?{urlencode(params)}"
     last_error: Exception | None = None
 
     ssl_context = ssl.create_default_context(cafile=certifi.where())
@@ -128,7 +170,10 @@ def fetch_preferences(config: PublicRosterConfig) -> Preferences:
         "/time-roster-public/preferences",
         {"companyId": config.company_id, "token": config.token},
     )
+    return parse_preferences(payload)
 
+
+def parse_preferences(payload: dict[str, Any]) -> Preferences:
     required_keys = {"weekStart", "dayStart", "localeTimeZone", "companyName"}
     missing = required_keys.difference(payload)
     if missing:
@@ -147,6 +192,41 @@ def fetch_preferences(config: PublicRosterConfig) -> Preferences:
     )
 
 
+def load_cached_preferences(
+    path: Path, company_id: str, now: dt.datetime, ttl: dt.timedelta = PREFERENCES_CACHE_TTL
+) -> Preferences | None:
+    """Preferences saved for company_id within ttl of now, or None."""
+    if not path.exists():
+        return None
+    try:
+        entry = json.loads(path.read_text(encoding="utf-8")).get(company_id)
+        fetched_at = dt.datetime.fromisoformat(entry["fetchedAt"])
+        if now - fetched_at > ttl:
+            return None
+        return parse_preferences(entry["preferences"])
+    except (OSError, json.JSONDecodeError, AttributeError, KeyError, TypeError, ValueError, ScraperError):
+        return None
+
+
+def save_cached_preferences(path: Path, company_id: str, preferences: Preferences, now: dt.datetime) -> None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    except (OSError, json.JSONDecodeError):
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    data[company_id] = {
+        "fetchedAt": now.isoformat(),
+        "preferences": {
+            "weekStart": preferences.week_start,
+            "dayStart": preferences.day_start.isoformat(),
+            "localeTimeZone": preferences.timezone,
+            "companyName": preferences.company_name,
+        },
+    }
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
 def api_weekday_to_python(week_start: int) -> int:
     if week_start < 0 or week_start > 6:
         raise ScraperError(f"Unsupported weekStart value: {week_start}")
@@ -175,6 +255,17 @@ def calculate_window(preferences: Preferences, now: dt.datetime | None = None, w
     return fetch_start, end_of_window
 
 
+def roster_weeks(start: dt.datetime, end: dt.datetime) -> list[tuple[dt.datetime, dt.datetime]]:
+    """Split a calculate_window() range into consecutive roster weeks."""
+    weeks: list[tuple[dt.datetime, dt.datetime]] = []
+    week_start = start
+    while week_start < end:
+        week_end = min(week_start + dt.timedelta(weeks=1), end)
+        weeks.append((week_start, week_end))
+        week_start = week_end
+    return weeks
+
+
 def fetch_roster_payload(config: PublicRosterConfig, start: dt.datetime, end: dt.datetime) -> dict[str, Any]:
     payload = http_get_json(
         "/time-roster-public",
@@ -194,10 +285,58 @@ def fetch_roster_payload(config: PublicRosterConfig, start: dt.datetime, end: dt
     return payload
 
 
+def fetch_roster_with_preferences(
+    config: PublicRosterConfig,
+    weeks_ahead: int,
+    now: dt.datetime,
+    cache_path: Path = PREFERENCES_CACHE_PATH,
+) -> tuple[Preferences, dt.datetime, dt.datetime, dict[str, Any]]:
+    """Fetch the current roster window, using cached preferences to skip the serial round trip.
+
+    With fresh cached preferences the roster request goes out immediately while the
+    preferences are refreshed alongside it; the roster is refetched only if the
+    refreshed preferences move the window.
+    """
+    cached = load_cached_preferences(cache_path, config.company_id, now)
+    if cached is None:
+        preferences = fetch_preferences(config)
+        start, end = calculate_window(preferences, now=now, weeks_ahead=weeks_ahead)
+        payload = fetch_roster_payload(config, start, end)
+        save_cached_preferences(cache_path, config.company_id, preferences, now)
+        return preferences, start, end, payload
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        refresh: Future[Preferences] = pool.submit(fetch_preferences, config)
+        start, end = calculate_window(cached, now=now, weeks_ahead=weeks_ahead)
+        payload = fetch_roster_payload(config, start, end)
+        try:
+            preferences = refresh.result()
+        except ScraperError as exc:
+            print(f"WARNING: using cached preferences, refresh failed: {exc}", file=sys.stderr)
+            return cached, start, end, payload
+
+    save_cached_preferences(cache_path, config.company_id, preferences, now)
+    refreshed_start, refreshed_end = calculate_window(preferences, now=now, weeks_ahead=weeks_ahead)
+    if (refreshed_start, refreshed_end) != (start, end):
+        payload = fetch_roster_payload(config, refreshed_start, refreshed_end)
+    return preferences, refreshed_start, refreshed_end, payload
+
+
 def company_display_name(company_name: str) -> str:
     return company_name.replace(" ", "")
 
 
+def staff_names(payload: dict[str, Any]) -> dict[str, str]:
+    names: dict[str, str] = {}
+    staff = payload.get("staff")
+    if isinstance(staff, list):
+        for member in staff:
+            mid = member.get("id")
+            if mid:
+                names[str(mid)] = (member.get("name") or "").strip()
+    return names
+
+
 def get_employee_id(payload: dict[str, Any], employee_name: str) -> str:
     staff = payload.get("staff")
     if not isinstance(staff, list):
@@ -283,6 +422,10 @@ def _break_end_keys() -> tuple[str, ...]:
     )
 
 
+def _break_total_keys() -> tuple[str, ...]:
+    return ("totalBreakMinutes", "scheduledBreakMinutes", "breakMinutesTotal", "totalUnpaidBreakMinutes")
+
+
 def _break_duration_minutes(br: dict[str, Any]) -> int | None:
     for key in ("durationMinutes", "duration", "lengthMinutes", "minutes", "breakMinutes", "durationMins"):
         if key in br and br[key] is not None:
@@ -318,6 +461,26 @@ def _gather_break_entries(shift_item: dict[str, Any]) -> list[Any]:
     return out
 
 
+def _break_bounds(br: dict[str, Any], tz: dt.tzinfo) -> tuple[dt.datetime | None, dt.datetime | None]:
+    start: dt.datetime | None = None
+    end: dt.datetime | None = None
+    for key in _break_start_keys():
+        if key in br:
+            start = _parse_datetime_flexible(br.get(key), tz)
+            if start is not None:
+                break
+    for key in _break_end_keys():
+        if key in br:
+            end = _parse_datetime_flexible(br.get(key), tz)
+            if end is not None:
+                break
+    if start is not None and start.tzinfo is None:
+        start = start.replace(tzinfo=tz)
+    if end is not None and end.tzinfo is None:
+        end = end.replace(tzinfo=tz)
+    return start, end
+
+
 def format_shift_breaks(shift_item: dict[str, Any], reference: dt.datetime) -> tuple[str, ...]:
     """Turn API break entries into display lines (start/end times or duration)."""
     entries = _gather_break_entries(shift_item)
@@ -327,23 +490,8 @@ def format_shift_breaks(shift_item: dict[str, Any], reference: dt.datetime) -> t
     for i, br in enumerate(entries, start=1):
         if not isinstance(br, dict):
             continue
-        start: dt.datetime | None = None
-        end: dt.datetime | None = None
-        for key in _break_start_keys():
-            if key in br:
-                start = _parse_datetime_flexible(br.get(key), tz)
-                if start is not None:
-                    break
-        for key in _break_end_keys():
-            if key in br:
-                end = _parse_datetime_flexible(br.get(key), tz)
-                if end is not None:
-                    break
+        start, end = _break_bounds(br, tz)
         if start is not None and end is not None:
-            if start.tzinfo is None:
-                start = start.replace(tzinfo=tz)
-            if end.tzinfo is None:
-                end = end.replace(tzinfo=tz)
             ls = start.astimezone(tz)
             le = end.astimezone(tz)
             if ls.date() == le.date():
@@ -356,7 +504,7 @@ def format_shift_breaks(shift_item: dict[str, Any], reference: dt.datetime) -> t
                 lines.append(f"Break {i}: {duration} minutes")
 
     if not lines:
-        for key in ("totalBreakMinutes", "scheduledBreakMinutes", "breakMinutesTotal", "totalUnpaidBreakMinutes"):
+        for key in _break_total_keys():
             if key not in shift_item or shift_item[key] is None:
                 continue
             try:
@@ -370,22 +518,114 @@ def format_shift_breaks(shift_item: dict[str, Any], reference: dt.datetime) -> t
     return tuple(lines)
 
 
-def overlapping_coworkers(payload: dict[str, Any], employee_id: str, shift: ShiftEvent) -> list[tuple[str, str]]:
+def shift_break_minutes(shift_item: dict[str, Any], reference: dt.datetime) -> int:
+    """Total break minutes for a shift, read from the same fields as format_shift_breaks."""
+    tz = reference.tzinfo or dt.timezone.utc
+    total = 0
+    found = False
+    for br in _gather_break_entries(shift_item):
+        if not isinstance(br, dict):
+            continue
+        start, end = _break_bounds(br, tz)
+        if start is not None and end is not None:
+            total += max(0, int((end - start).total_seconds() // 60))
+            found = True
+        else:
+            duration = _break_duration_minutes(br)
+            if duration is not None:
+                total += max(0, duration)
+                found = True
+
+    if not found:
+        for key in _break_total_keys():
+            if key not in shift_item or shift_item[key] is None:
+                continue
+            try:
+                minutes = int(shift_item[key])
+            except (TypeError, ValueError):
+                continue
+            if minutes > 0:
+                total = minutes
+                break
+
+    return total
+
+
+def load_coworker_roles() -> frozenset[str]:
+    raw = os.environ.get("ROSTER_COWORKER_ROLES", "").strip()
+    if not raw:
+        return COWORKER_ALLOWED_ROLES
+    return frozenset(part.strip().lower() for part in raw.split(",") if part.strip())
+
+
+@dataclass(frozen=True)
+class RoleIndex:
+    """Rostered shifts bucketed by role, with the buckets that count as coworkers."""
+
+    known_ids: frozenset[str]
+    allowed_keys: frozenset[str]
+    buckets: dict[str, list[tuple[int, dict[str, Any]]]]
+
+    def role_key(self, item: dict[str, Any]) -> str:
+        role_id = str(item.get("roleId") or "")
+        if role_id in self.known_ids:
+            return role_id
+        # Shifts whose roleId is missing or not in payload["roles"] fall back to the role name
+        return "name:" + (item.get("roleName") or "").strip().lower()
+
+    def allows(self, item: dict[str, Any]) -> bool:
+        return self.role_key(item) in self.allowed_keys
+
+    def eligible_shifts(self) -> list[tuple[int, dict[str, Any]]]:
+        out: list[tuple[int, dict[str, Any]]] = []
+        for key in self.allowed_keys:
+            out.extend(self.buckets.get(key, ()))
+        return out
+
+    def coworker_ids(self) -> frozenset[str]:
+        """Staff rostered in a coworker role anywhere in the payload."""
+        return frozenset(str(item["staffMemberId"]) for _, item in self.eligible_shifts() if item.get("staffMemberId"))
+
+
+def build_role_index(payload: dict[str, Any], role_names: frozenset[str] = COWORKER_ALLOWED_ROLES) -> RoleIndex:
+    roles = payload.get("roles")
+    known_ids: set[str] = set()
+    allowed_keys = {f"name:{name}" for name in role_names}
+    if isinstance(roles, list):
+        for role in roles:
+            role_id = role.get("id") if isinstance(role, dict) else None
+            if not role_id:
+                continue
+            known_ids.add(str(role_id))
+            if (role.get("name") or "").strip().lower() in role_names:
+                allowed_keys.add(str(role_id))
+
+    index = RoleIndex(known_ids=frozenset(known_ids), allowed_keys=frozenset(allowed_keys), buckets={})
+    rostered_shifts = payload.get("rosteredShifts")
+    if isinstance(rostered_shifts, list):
+        for position, item in enumerate(rostered_shifts):
+            index.buckets.setdefault(index.role_key(item), []).append((position, item))
+    return index
+
+
+def overlapping_coworkers(
+    payload: dict[str, Any],
+    employee_id: str,
+    shift: ShiftEvent,
+    role_index: RoleIndex | None = None,
+) -> list[tuple[str, str]]:
     """Other staff on rostered shifts that overlap this shift; (name, role)."""
     staff = payload.get("staff")
     rostered_shifts = payload.get("rosteredShifts")
     if not isinstance(staff, list) or not isinstance(rostered_shifts, list):
         return []
+    role_index = role_index or build_role_index(payload)
 
-    id_to_name: dict[str, str] = {}
-    for member in staff:
-        mid = member.get("id")
-        if mid:
-            id_to_name[str(mid)] = (member.get("name") or "").strip()
+    id_to_name = staff_names(payload)
 
-    seen_ids: set[str] = set()
-    out: list[tuple[str, str]] = []
-    for item in rostered_shifts:
+    # Staff id -> (payload position, role name); the earliest shift in payload order wins
+    found: dict[str, tuple[int, str]] = {}
+    for position, item in role_index.eligible_shifts():
         sid = item.get("staffMemberId")
         if not sid or sid == employee_id:
             continue
@@ -397,22 +637,311 @@ def overlapping_coworkers(payload: dict[str, Any], employee_id: str, shift: Shif
         other_end = dt.datetime.fromisoformat(end_raw)
         if not (shift.start < other_end and shift.end > other_start):
             continue
-        role_name = (item.get("roleName") or "").strip()
-        if role_name.lower() not in COWORKER_ALLOWED_ROLES:
-            continue
-        name = id_to_name.get(str(sid), "")
-        if not name:
+        if not id_to_name.get(str(sid), ""):
             continue
-        key = str(sid)
-        if key in seen_ids:
-            continue
-        seen_ids.add(key)
-        out.append((name, role_name))
+        _note_coworker(found, str(sid), position, (item.get("roleName") or "").strip())
 
+    out = [(id_to_name[sid], role_name) for sid, (_, role_name) in found.items()]
     out.sort(key=lambda pair: (pair[0].lower(), pair[1].lower()))
     return out
 
 
+@dataclass
+class OverlapCell:
+    minutes: float = 0.0
+    shared_shifts: int = 0
+
+
+@dataclass(frozen=True)
+class CoworkerOverlap:
+    names: dict[str, str]
+    cells: dict[tuple[str, str], OverlapCell]
+    coworkers_by_shift: dict[str, list[tuple[str, str]]]
+    # The role filter the sweep used; per-shift fallbacks must reuse it rather than rebuild the defaults
+    role_index: RoleIndex | None = None
+
+
+def build_coworker_overlap(
+    payload: dict[str, Any], role_index: RoleIndex | None = None
+) -> CoworkerOverlap:
+    """Sweep every rostered shift once, pairing each start with the shifts still open.
+
+    cells holds overlapping minutes and shared shift counts for staff pairs where both
+    shifts are in a coworker role of role_index. coworkers_by_shift gives, for every shift of any role,
+    the same "Working with" list overlapping_coworkers() builds for one employee.
+    """
+    staff = payload.get("staff")
+    rostered_shifts = payload.get("rosteredShifts")
+    if not isinstance(staff, list) or not isinstance(rostered_shifts, list):
+        return CoworkerOverlap(names={}, cells={}, coworkers_by_shift={})
+    role_index = role_index or build_role_index(payload)
+
+    names = staff_names(payload)
+
+    records: list[tuple[str, str, bool, float, float, str]] = []
+    points: list[tuple[float, int, int]] = []
+    for item in rostered_shifts:
+        sid = item.get("staffMemberId")
+        start_raw = item.get("clockinTime")
+        end_raw = item.get("clockoutTime")
+        if not sid or not start_raw or not end_raw:
+            continue
+        start = dt.datetime.fromisoformat(start_raw).timestamp()
+        end = dt.datetime.fromisoformat(end_raw).timestamp()
+        if end <= start:
+            continue
+        role_name = (item.get("roleName") or "").strip()
+        index = len(records)
+        records.append((str(sid), role_name, role_index.allows(item), start, end, str(item.get("id") or "")))
+        # Ends sort before starts at the same instant: shifts that merely touch do not overlap
+        points.append((start, 1, index))
+        points.append((end, 0, index))
+    points.sort()
+
+    cells: dict[tuple[str, str], OverlapCell] = {}
+    found: dict[int, dict[str, tuple[int, str]]] = {}
+    active: set[int] = set()
+    for _, is_start, index in points:
+        if not is_start:
+            active.discard(index)
+            continue
+        sid, role_name, allowed, start, end, _ = records[index]
+        for other in active:
+            other_sid, other_role, other_allowed, _, other_end, _ = records[other]
+            if other_sid == sid:
+                continue
+            if other_allowed:
+                _note_coworker(found.setdefault(index, {}), other_sid, other, other_role)
+            if allowed:
+                _note_coworker(found.setdefault(other, {}), sid, index, role_name)
+            if allowed and other_allowed:
+                cell = cells.setdefault((min(sid, other_sid), max(sid, other_sid)), OverlapCell())
+                cell.minutes += (min(end, other_end) - start) / 60
+                cell.shared_shifts += 1
+        active.add(index)
+
+    coworkers_by_shift: dict[str, list[tuple[str, str]]] = {}
+    for index, record in enumerate(records):
+        shift_id = record[5]
+        if not shift_id:
+            continue
+        out = [
+            (names[other_sid], role_name)
+            for other_sid, (_, role_name) in found.get(index, {}).items()
+            if names.get(other_sid)
+        ]
+        out.sort(key=lambda pair: (pair[0].lower(), pair[1].lower()))
+        coworkers_by_shift[shift_id] = out
+
+    return CoworkerOverlap(names=names, cells=cells, coworkers_by_shift=coworkers_by_shift, role_index=role_index)
+
+
+def _note_coworker(seen: dict[str, tuple[int, str]], staff_id: str, index: int, role_name: str) -> None:
+    # Keep the role from the earliest shift in payload order, as overlapping_coworkers() does
+    current = seen.get(staff_id)
+    if current is None or index < current[0]:
+        seen[staff_id] = (index, role_name)
+
+
+def _overlap_rows(overlap: CoworkerOverlap) -> list[dict[str, Any]]:
+    rows = []
+    for (first, second), cell in sorted(overlap.cells.items()):
+        rows.append({
+            "staffId": first,
+            "staffName": overlap.names.get(first, ""),
+            "coworkerId": second,
+            "coworkerName": overlap.names.get(second, ""),
+            "overlapMinutes": round(cell.minutes),
+            "sharedShifts": cell.shared_shifts,
+        })
+    return rows
+
+
+def render_overlap_csv(overlap: CoworkerOverlap) -> str:
+    buffer = io.StringIO()
+    fieldnames = ["staffId", "staffName", "coworkerId", "coworkerName", "overlapMinutes", "sharedShifts"]
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(_overlap_rows(overlap))
+    return buffer.getvalue()
+
+
+def render_overlap_json(overlap: CoworkerOverlap) -> str:
+    return json.dumps(_overlap_rows(overlap), ensure_ascii=False, indent=2) + "\n"
+
+
+@dataclass(frozen=True)
+class LeaveInterval:
+    start: float
+    end: float
+    staff_id: str
+    label: str
+
+
+class IntervalIndex:
+    """Implicit augmented interval tree over intervals sorted by start.
+
+    The midpoint of every slice [lo, hi) is a node whose children are the two halves; max_ends[mid]
+    holds the latest end in that subtree. A query skips any subtree ending at or before its start
+    and everything right of a node starting at or after its end, so one long interval only keeps
+    its own ancestors open instead of forcing a scan back to it. A query costs O(min(n, k log n))
+    for k matches.
+    """
+
+    def __init__(self, intervals: list[LeaveInterval]) -> None:
+        self.intervals = sorted(intervals, key=lambda item: (item.start, item.end))
+        self.starts = [item.start for item in self.intervals]
+        self.max_ends = [item.end for item in self.intervals]
+        self._augment(0, len(self.intervals))
+
+    def _augment(self, lo: int, hi: int) -> float:
+        if lo >= hi:
+            return float("-inf")
+        mid = (lo + hi) // 2
+        self.max_ends[mid] = max(self.max_ends[mid], self._augment(lo, mid), self._augment(mid + 1, hi))
+        return self.max_ends[mid]
+
+    def overlapping(self, start: float, end: float) -> list[LeaveInterval]:
+        out: list[LeaveInterval] = []
+        # In-order walk with an explicit stack so results come back sorted by start
+        stack: list[tuple[int, int, bool]] = [(0, len(self.intervals), False)]
+        while stack:
+            lo, hi, expanded = stack.pop()
+            mid = (lo + hi) // 2
+            if expanded:
+                interval = self.intervals[mid]
+                if interval.end > start:
+                    out.append(interval)
+                if mid + 1 < hi:
+                    stack.append((mid + 1, hi, False))
+                continue
+            if lo >= hi:
+                continue
+            if self.max_ends[mid] <= start:
+                continue
+            if self.starts[mid] < end:
+                stack.append((lo, hi, True))
+            stack.append((lo, mid, False))
+        return out
+
+
+@dataclass(frozen=True)
+class LeaveIndex:
+    names: dict[str, str]
+    by_staff: dict[str, IntervalIndex]
+    # Leave of staff the role filter counts as coworkers; Working with hides everyone else
+    coworkers: IntervalIndex
+
+    def staff_leave(self, staff_id: str, start: dt.datetime, end: dt.datetime) -> list[LeaveInterval]:
+        index = self.by_staff.get(staff_id)
+        if index is None:
+            return []
+        return index.overlapping(start.timestamp(), end.timestamp())
+
+    def on_leave(self, start: dt.datetime, end: dt.datetime) -> list[LeaveInterval]:
+        return self.coworkers.overlapping(start.timestamp(), end.timestamp())
+
+
+@dataclass(frozen=True)
+class LeaveNotes:
+    own: tuple[str, ...] = ()
+    others: tuple[tuple[str, str], ...] = ()
+
+
+def _leave_start_keys() -> tuple[str, ...]:
+    return ("startTime", "startDate", "startDateTime", "start", "fromDate", "from")
+
+
+def _leave_end_keys() -> tuple[str, ...]:
+    return ("endTime", "endDate", "endDateTime", "end", "toDate", "to")
+
+
+def _parse_leave_bound(value: Any, tz: dt.tzinfo, is_end: bool) -> dt.datetime | None:
+    # Whole-day leave comes through as a bare date; the end date is inclusive
+    if isinstance(value, str) and re.fullmatch(r"\d{4}-\d{2}-\d{2}", value.strip()):
+        day = dt.date.fromisoformat(value.strip())
+        if is_end:
+            day += dt.timedelta(days=1)
+        return dt.datetime.combine(day, dt.time(0), tzinfo=tz)
+    parsed = _parse_datetime_flexible(value, tz)
+    if parsed is not None and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=tz)
+    return parsed
+
+
+def _first_leave_bound(item: dict[str, Any], keys: tuple[str, ...], tz: dt.tzinfo, is_end: bool) -> dt.datetime | None:
+    for key in keys:
+        if key in item:
+            bound = _parse_leave_bound(item[key], tz, is_end)
+            if bound is not None:
+                return bound
+    return None
+
+
+def _leave_is_approved(item: dict[str, Any]) -> bool:
+    for key in ("isApproved", "approved"):
+        if key in item and item[key] is not None:
+            return bool(item[key])
+    for key in ("status", "leaveStatus", "state"):
+        if item.get(key) is not None:
+            return str(item[key]).strip().lower() in {"approved", "accepted"}
+    # The public roster only publishes leave that has been signed off
+    return True
+
+
+def _leave_label(item: dict[str, Any]) -> str:
+    for key in ("leaveTypeName", "leaveType", "type", "reason", "name"):
+        value = item.get(key)
+        if isinstance(value, str) and value.strip():
+            return value.strip()
+    return "Leave"
+
+
+def build_leave_index(payload: dict[str, Any], tz: dt.tzinfo, role_index: RoleIndex | None = None) -> LeaveIndex:
+    """Index approved leaveRequests by staff member and by time, once per payload.
+
+    tz is the company timezone from preferences; date-only leave covers whole days there.
+    Only staff with a shift in one of role_index's coworker roles are listed as coworkers on leave.
+    """
+    names = staff_names(payload)
+
+    intervals: list[LeaveInterval] = []
+    leave_requests = payload.get("leaveRequests")
+    if isinstance(leave_requests, list):
+        for item in leave_requests:
+            if not isinstance(item, dict) or item.get("datestampDeleted") or not _leave_is_approved(item):
+                continue
+            sid = item.get("staffMemberId") or item.get("staffId")
+            start = _first_leave_bound(item, _leave_start_keys(), tz, is_end=False)
+            end = _first_leave_bound(item, _leave_end_keys(), tz, is_end=True)
+            if not sid or start is None or end is None or end <= start:
+                continue
+            intervals.append(LeaveInterval(start.timestamp(), end.timestamp(), str(sid), _leave_label(item)))
+
+    per_staff: dict[str, list[LeaveInterval]] = {}
+    for interval in intervals:
+        per_staff.setdefault(interval.staff_id, []).append(interval)
+    coworker_ids = (role_index or build_role_index(payload)).coworker_ids()
+    return LeaveIndex(
+        names=names,
+        by_staff={sid: IntervalIndex(items) for sid, items in per_staff.items()},
+        coworkers=IntervalIndex([interval for interval in intervals if interval.staff_id in coworker_ids]),
+    )
+
+
+def leave_notes(leave_index: LeaveIndex, shift: ShiftEvent) -> LeaveNotes:
+    """The shift owner's approved leave, and coworkers on leave, during the shift."""
+    own = tuple(item.label for item in leave_index.staff_leave(shift.staff_member_id, shift.start, shift.end))
+    others: dict[str, tuple[str, str]] = {}
+    for item in leave_index.on_leave(shift.start, shift.end):
+        name = leave_index.names.get(item.staff_id, "")
+        if item.staff_id == shift.staff_member_id or not name or item.staff_id in others:
+            continue
+        others[item.staff_id] = (name, item.label)
+    pairs = sorted(others.values(), key=lambda pair: (pair[0].lower(), pair[1].lower()))
+    return LeaveNotes(own=own, others=tuple(pairs))
+
+
 def parse_jobs(raw_jobs: Any) -> tuple[str, ...]:
     if raw_jobs in (None, "", []):
         return ()
@@ -430,35 +959,44 @@ def parse_jobs(raw_jobs: Any) -> tuple[str, ...]:
     return (str(raw_jobs).strip(),)
 
 
-def extract_employee_shifts(payload: dict[str, Any], employee_name: str) -> list[ShiftEvent]:
+def build_shift_events(payload: dict[str, Any], staff_id: str | None = None) -> list[ShiftEvent]:
+    """ShiftEvents for every rostered shift, or only staff_id's, sorted by start.
+
+    Incomplete rows are skipped venue-wide but are an error when building one employee's shifts.
+    """
     rostered_shifts = payload.get("rosteredShifts")
-    if not isinstance(rostered_shifts, list):
+    if not isinstance(payload.get("staff"), list) or not isinstance(rostered_shifts, list):
         raise ScraperError("Roster payload must include list values for staff and rosteredShifts")
-
-    employee_id = get_employee_id(payload, employee_name)
+    names = staff_names(payload)
 
     shifts: list[ShiftEvent] = []
     for item in rostered_shifts:
-        if item.get("staffMemberId") != employee_id:
+        sid = item.get("staffMemberId")
+        if not sid or (staff_id is not None and sid != staff_id):
             continue
         shift_id = item.get("id")
         start_raw = item.get("clockinTime")
         end_raw = item.get("clockoutTime")
-        if not shift_id or not start_raw or not end_raw:
-            raise ScraperError(f"Malformed shift payload for employee {employee_name!r}: {item!r}")
-        start = dt.datetime.fromisoformat(start_raw)
-        end = dt.datetime.fromisoformat(end_raw)
-        breaks_display = format_shift_breaks(item, start)
+        try:
+            if not shift_id or not start_raw or not end_raw:
+                raise ValueError("missing id, clockinTime or clockoutTime")
+            start = dt.datetime.fromisoformat(start_raw)
+            end = dt.datetime.fromisoformat(end_raw)
+        except (TypeError, ValueError):
+            if staff_id is None:
+                continue
+            raise ScraperError(f"Malformed shift payload for employee {names.get(str(sid), sid)!r}: {item!r}")
         shifts.append(
             ShiftEvent(
                 shift_id=shift_id,
-                staff_member_id=employee_id,
-                staff_name=employee_name,
-                role_name=(item.get("roleName") or "").strip(),
-                jobs=parse_jobs(item.get("jobs")),
-                breaks_display=breaks_display,
+                staff_member_id=sys.intern(str(sid)),
+                staff_name=sys.intern(names.get(str(sid), "")),
+                role_name=sys.intern((item.get("roleName") or "").strip()),
+                jobs=tuple(sys.intern(job) for job in parse_jobs(item.get("jobs"))),
+                breaks_display=tuple(sys.intern(line) for line in format_shift_breaks(item, start)),
                 start=start,
                 end=end,
+                break_minutes=shift_break_minutes(item, start),
             )
         )
 
@@ -466,6 +1004,10 @@ def extract_employee_shifts(payload: dict[str, Any], employee_name: str) -> list
     return shifts
 
 
+def extract_employee_shifts(payload: dict[str, Any], employee_name: str) -> list[ShiftEvent]:
+    return build_shift_events(payload, get_employee_id(payload, employee_name))
+
+
 def escape_ical_text(value: str) -> str:
     return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
 
@@ -474,6 +1016,8 @@ def fold_ical_line(line: str) -> str:
     encoded = line.encode("utf-8")
     if len(encoded) <= 75:
         return line
+    if len(encoded) == len(line):
+        return "\r\n ".join(line[i:i + 75] for i in range(0, len(line), 75))
 
     segments: list[str] = []
     current = ""
@@ -501,33 +1045,74 @@ def format_utc_timestamp(value: dt.datetime) -> str:
 TRAVEL_MINUTES = 45
 
 
+_VEVENT_MARKER = re.compile(rb"^(BEGIN|END):VEVENT$", re.MULTILINE)
+_UID_LINE = re.compile(rb"^UID:(.*)$", re.MULTILINE)
+_DTSTART_LINE = re.compile(rb"^DTSTART:(.*)$", re.MULTILINE)
+
+
+class EventArchive:
+    """VEVENT blocks of an existing .ics kept as slices of one bytes blob, indexed by UID.
+
+    Archived events are only ever copied back out verbatim, so they stay encoded
+    instead of being split into a str per line.
+    """
+
+    def __init__(self, blob: bytes = b"", index: dict[str, tuple[int, int, str]] | None = None) -> None:
+        self.blob = blob
+        self.index = index or {}
+
+    @classmethod
+    def load(cls, path: Path) -> "EventArchive":
+        if not path.exists():
+            return cls()
+        raw = path.read_bytes()
+        # Normalise line endings so each event is one contiguous \n-separated slice
+        blob = raw.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        index: dict[str, tuple[int, int, str]] = {}
+        begin: int | None = None
+        for marker in _VEVENT_MARKER.finditer(blob):
+            if marker.group(1) == b"BEGIN":
+                begin = marker.start()
+            elif begin is not None:
+                end = marker.end()
+                uid = b""
+                for uid_match in _UID_LINE.finditer(blob, begin, end):
+                    uid = uid_match.group(1)
+                if uid:
+                    dtstart = _DTSTART_LINE.search(blob, begin, end)
+                    index[sys.intern(uid.decode("utf-8"))] = (
+                        begin,
+                        end,
+                        dtstart.group(1).decode("utf-8") if dtstart else "",
+                    )
+                begin = None
+        return cls(blob, index)
+
+    def __contains__(self, uid: str) -> bool:
+        return uid in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def dtstart(self, uid: str) -> str:
+        return self.index[uid][2]
+
+    def event_text(self, uid: str) -> str:
+        begin, end, _ = self.index[uid]
+        return self.blob[begin:end].decode("utf-8").replace("\n", "\r\n")
+
+    def event_lines(self, uid: str) -> list[str]:
+        begin, end, _ = self.index[uid]
+        return self.blob[begin:end].decode("utf-8").split("\n")
+
+
 def load_existing_events(path: Path) -> dict[str, list[str]]:
     """Parse an existing .ics file and return {uid: lines} for every VEVENT."""
-    if not path.exists():
-        return {}
-    text = path.read_text(encoding="utf-8")
-    # Normalise line endings then split
-    raw_lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
-    events: dict[str, list[str]] = {}
-    in_event = False
-    current: list[str] = []
-    uid: str | None = None
-    for line in raw_lines:
-        if line == "BEGIN:VEVENT":
-            in_event = True
-            current = ["BEGIN:VEVENT"]
-            uid = None
-        elif line == "END:VEVENT" and in_event:
-            current.append("END:VEVENT")
-            if uid:
-                events[uid] = current
-            in_event = False
-            current = []
-        elif in_event:
-            current.append(line)
-            if line.startswith("UID:"):
-                uid = line[4:]
-    return events
+    archive = EventArchive.load(path)
+    return {uid: archive.event_lines(uid) for uid in archive}
 
 
 def _event_dtstart(lines: list[str]) -> str:
@@ -537,28 +1122,73 @@ def _event_dtstart(lines: list[str]) -> str:
     return ""
 
 
+@dataclass(frozen=True)
+class EventTemplate:
+    """Escaped and folded lines that are the same for every event in one calendar render."""
+
+    dtstamp: str
+    travel_tail: tuple[str, ...]
+    summary: str
+    event_tail: tuple[str, ...]
+
+
+def build_event_template(company_name: str, generated_at: dt.datetime) -> EventTemplate:
+    display_name = company_display_name(company_name)
+    location = fold_ical_line(f"LOCATION:{escape_ical_text(LOCATION)}")
+    return EventTemplate(
+        dtstamp=f"DTSTAMP:{format_utc_timestamp(generated_at)}",
+        travel_tail=(
+            fold_ical_line(f"SUMMARY:{escape_ical_text(f'Travel to {display_name}')}"),
+            location,
+            "STATUS:CONFIRMED",
+            "TRANSP:OPAQUE",
+            "END:VEVENT",
+        ),
+        summary=fold_ical_line(f"SUMMARY:{escape_ical_text(display_name)}"),
+        event_tail=(
+            location,
+            "STATUS:CONFIRMED",
+            "TRANSP:OPAQUE",
+            "BEGIN:VALARM",
+            "TRIGGER:-PT1H",
+            "ACTION:DISPLAY",
+            "DESCRIPTION:Shift starting in 1 hour",
+            "END:VALARM",
+            "END:VEVENT",
+        ),
+    )
+
+
 def render_travel_event(
     shift: ShiftEvent,
     generated_at: dt.datetime,
     company_name: str,
+    template: EventTemplate | None = None,
 ) -> list[str]:
-    display_name = company_display_name(company_name)
+    template = template or build_event_template(company_name, generated_at)
     travel_end = shift.start
     travel_start = travel_end - dt.timedelta(minutes=TRAVEL_MINUTES)
-    uid = f"travel-{make_uid(shift)}"
-    lines = [
+    return [
         "BEGIN:VEVENT",
-        f"UID:{uid}",
-        f"DTSTAMP:{format_utc_timestamp(generated_at)}",
+        fold_ical_line(f"UID:travel-{make_uid(shift)}"),
+        template.dtstamp,
         f"DTSTART:{format_utc_timestamp(travel_start)}",
         f"DTEND:{format_utc_timestamp(travel_end)}",
-        f"SUMMARY:{escape_ical_text(f'Travel to {display_name}')}",
-        f"LOCATION:{escape_ical_text(LOCATION)}",
-        "STATUS:CONFIRMED",
-        "TRANSP:OPAQUE",
-        "END:VEVENT",
+        *template.travel_tail,
     ]
-    return [fold_ical_line(line) for line in lines]
+
+
+def _shift_coworkers(
+    shift: ShiftEvent,
+    payload: dict[str, Any],
+    employee_id: str,
+    overlap: CoworkerOverlap | None,
+) -> list[tuple[str, str]]:
+    if overlap is None:
+        return overlapping_coworkers(payload, employee_id, shift)
+    if shift.shift_id in overlap.coworkers_by_shift:
+        return overlap.coworkers_by_shift[shift.shift_id]
+    return overlapping_coworkers(payload, employee_id, shift, overlap.role_index)
 
 
 def render_event(
@@ -567,23 +1197,35 @@ def render_event(
     company_name: str,
     payload: dict[str, Any],
     employee_id: str,
+    overlap: CoworkerOverlap | None = None,
+    template: EventTemplate | None = None,
+    leave: LeaveNotes | None = None,
 ) -> list[str]:
-    display_name = company_display_name(company_name)
-    summary = display_name
+    template = template or build_event_template(company_name, generated_at)
 
     description_parts: list[str] = []
 
+    if leave is not None and leave.own:
+        description_parts.extend(f"On approved leave: {label}" for label in leave.own)
+        description_parts.append("")
+
     if shift.breaks_display:
         description_parts.extend(shift.breaks_display)
         description_parts.append("")
 
-    coworkers = overlapping_coworkers(payload, employee_id, shift)
+    coworkers = _shift_coworkers(shift, payload, employee_id, overlap)
     if coworkers:
         description_parts.append("Working with:")
         for name, role in coworkers:
             description_parts.append(f"- {name} — {role}")
         description_parts.append("")
 
+    if leave is not None and leave.others:
+        description_parts.append("Staff on leave:")
+        for name, label in leave.others:
+            description_parts.append(f"- {name} — {label}")
+        description_parts.append("")
+
     description_parts.append(f"Staff: {shift.staff_name}")
     if shift.role_name:
         description_parts.append(f"Role: {shift.role_name}")
@@ -591,27 +1233,91 @@ def render_event(
         description_parts.append(f"Jobs: {', '.join(shift.jobs)}")
     description_parts.append(f"Shift ID: {shift.shift_id}")
     description = escape_ical_text(chr(10).join(description_parts))
-    location = escape_ical_text(LOCATION.replace("\n", chr(10)))
 
-    lines = [
+    return [
         "BEGIN:VEVENT",
-        f"UID:{make_uid(shift)}",
-        f"DTSTAMP:{format_utc_timestamp(generated_at)}",
+        fold_ical_line(f"UID:{make_uid(shift)}"),
+        template.dtstamp,
         f"DTSTART:{format_utc_timestamp(shift.start)}",
         f"DTEND:{format_utc_timestamp(shift.end)}",
-        f"SUMMARY:{escape_ical_text(summary)}",
-        f"DESCRIPTION:{description}",
-        f"LOCATION:{location}",
-        "STATUS:CONFIRMED",
-        "TRANSP:OPAQUE",
-        "BEGIN:VALARM",
-        "TRIGGER:-PT1H",
-        "ACTION:DISPLAY",
-        "DESCRIPTION:Shift starting in 1 hour",
-        "END:VALARM",
-        "END:VEVENT",
+        template.summary,
+        fold_ical_line(f"DESCRIPTION:{description}"),
+        *template.event_tail,
     ]
-    return [fold_ical_line(line) for line in lines]
+
+
+class RenderCache:
+    """Rendered VEVENT lines per shift, keyed by a hash of everything the renderer reads."""
+
+    def __init__(self, entries: dict[str, dict[str, Any]] | None = None) -> None:
+        self.entries = entries or {}
+        self.used: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: Path) -> "RenderCache":
+        if not path.exists():
+            return cls()
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return cls()
+        if not isinstance(data, dict) or data.get("version") != RENDER_CACHE_VERSION:
+            return cls()
+        entries = data.get("entries")
+        return cls(entries if isinstance(entries, dict) else None)
+
+    def save(self, path: Path) -> None:
+        # Only keep entries touched this run so shifts that left the window age out
+        kept = {key: self.entries[key] for key in sorted(self.used) if key in self.entries}
+        path.write_text(
+            json.dumps({"version": RENDER_CACHE_VERSION, "entries": kept}, ensure_ascii=False),
+            encoding="utf-8",
+        )
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        self.used.add(key)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: dict[str, Any]) -> None:
+        self.used.add(key)
+        self.entries[key] = entry
+
+
+def render_cache_key(
+    shift: ShiftEvent,
+    coworkers: list[tuple[str, str]],
+    company_name: str,
+    generated_at: dt.datetime,
+    leave: LeaveNotes | None = None,
+) -> str:
+    leave = leave or LeaveNotes()
+    material = [
+        RENDER_CACHE_VERSION,
+        shift.shift_id,
+        shift.staff_member_id,
+        shift.staff_name,
+        shift.role_name,
+        list(shift.jobs),
+        list(shift.breaks_display),
+        shift.start.isoformat(),
+        shift.end.isoformat(),
+        [list(pair) for pair in coworkers],
+        list(leave.own),
+        [list(pair) for pair in leave.others],
+        company_name,
+        format_utc_timestamp(generated_at),
+        LOCATION,
+        TRAVEL_MINUTES,
+    ]
+    encoded = json.dumps(material, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
 
 
 def render_calendar(
@@ -621,21 +1327,50 @@ def render_calendar(
     employee_id: str,
     generated_at: dt.datetime | None = None,
     existing_path: Path | None = None,
+    cache: RenderCache | None = None,
+    overlap: CoworkerOverlap | None = None,
+    leave_index: LeaveIndex | None = None,
 ) -> str:
     generated_at = generated_at or dt.datetime.now(dt.timezone.utc)
 
     # Seed with existing events so old shifts are never dropped
-    accumulated: dict[str, list[str]] = {}
-    if existing_path is not None:
-        accumulated = load_existing_events(existing_path)
+    archive = EventArchive.load(existing_path) if existing_path is not None else EventArchive()
+    accumulated: dict[str, list[str] | None] = dict.fromkeys(archive)
 
     # Generate new events; new version wins if the same UID already exists
+    if overlap is None and shifts:
+        overlap = build_coworker_overlap(payload)
+    template = build_event_template(company_name, generated_at)
     for shift in shifts:
-        travel_uid = f"travel-{make_uid(shift)}"
-        accumulated[travel_uid] = render_travel_event(shift, generated_at, company_name)
-        accumulated[make_uid(shift)] = render_event(shift, generated_at, company_name, payload, employee_id)
+        leave = leave_notes(leave_index, shift) if leave_index is not None else None
+        if cache is not None:
+            coworkers = _shift_coworkers(shift, payload, employee_id, overlap)
+            key = render_cache_key(shift, coworkers, company_name, generated_at, leave)
+            entry = cache.get(key)
+            if entry is None:
+                uid = make_uid(shift)
+                entry = {
+                    "uid": uid,
+                    "travel": render_travel_event(shift, generated_at, company_name, template),
+                    "event": render_event(
+                        shift, generated_at, company_name, payload, employee_id, overlap, template, leave
+                    ),
+                }
+                cache.put(key, entry)
+            accumulated[f"travel-{entry['uid']}"] = list(entry["travel"])
+            accumulated[entry["uid"]] = list(entry["event"])
+            continue
+        uid = make_uid(shift)
+        accumulated[f"travel-{uid}"] = render_travel_event(shift, generated_at, company_name, template)
+        accumulated[uid] = render_event(
+            shift, generated_at, company_name, payload, employee_id, overlap, template, leave
+        )
 
-    sorted_events = sorted(accumulated.values(), key=_event_dtstart)
+    def dtstart(uid: str) -> str:
+        lines = accumulated[uid]
+        return archive.dtstart(uid) if lines is None else _event_dtstart(lines)
+
+    sorted_uids = sorted(accumulated, key=dtstart)
 
     header = [
         "BEGIN:VCALENDAR",
@@ -647,13 +1382,17 @@ def render_calendar(
         f"X-WR-TIMEZONE:{escape_ical_text('Pacific/Auckland')}",
     ]
     all_lines: list[str] = header
-    for event_lines in sorted_events:
-        all_lines.extend(event_lines)
+    for uid in sorted_uids:
+        event_lines = accumulated[uid]
+        if event_lines is None:
+            all_lines.append(archive.event_text(uid))
+        else:
+            all_lines.extend(event_lines)
     all_lines.append("END:VCALENDAR")
     return "\r\n".join(all_lines) + "\r\n"
 
 
-def render_summary(shifts: list[ShiftEvent], company_name: str) -> str:
+def render_summary(shifts: list[ShiftEvent], company_name: str, leave_index: LeaveIndex | None = None) -> str:
     if not shifts:
         return "No upcoming shifts found.\n"
 
@@ -668,59 +1407,713 @@ def render_summary(shifts: list[ShiftEvent], company_name: str) -> str:
         lines.append(f"Time: {local_start:%I:%M%p} -> {local_end:%I:%M%p}")
         if shift.jobs:
             lines.append(f"Jobs: {', '.join(shift.jobs)}")
+        if leave_index is not None:
+            for label in leave_notes(leave_index, shift).own:
+                lines.append(f"Approved leave: {label}")
         lines.append("-" * 40)
     return "\n".join(lines) + "\n"
 
 
-def write_outputs(calendar_text: str, summary_text: str) -> None:
-    OUTPUT_PATH.write_text(calendar_text, encoding="utf-8", newline="")
-    SUMMARY_PATH.write_text(summary_text, encoding="utf-8", newline="")
-    PUBLIC_DIR.mkdir(parents=True, exist_ok=True)
-    PUBLIC_OUTPUT_PATH.write_text(calendar_text, encoding="utf-8", newline="")
-    PUBLIC_INDEX_PATH.write_text(
-        "\n".join(
-            [
-                "<!doctype html>",
-                "<html lang=\"en\">",
-                "<head>",
-                "  <meta charset=\"utf-8\">",
-                "  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">",
-                f"  <title>{CALENDAR_NAME}</title>",
-                "</head>",
-                "<body>",
-                f"  <p><a href=\"roster.ics\">Download {CALENDAR_NAME}</a></p>",
-                "</body>",
-                "</html>",
-                "",
-            ]
-        ),
-        encoding="utf-8",
-        newline="",
+@dataclass
+class HoursBucket:
+    shifts: int = 0
+    minutes: int = 0
+    break_minutes: int = 0
+    night_minutes: int = 0
+    weekend_minutes: int = 0
+
+
+class HoursGrid:
+    """Local midnights, night bounds and roster-day starts over a date range, as epoch seconds.
+
+    Running totals of night and weekend seconds at every boundary turn "how much of [start, end)
+    is night" into two bisects and a subtraction, so no shift touches a datetime.
+    """
+
+    def __init__(self, first_day: dt.date, last_day: dt.date, tz: dt.tzinfo, day_start: dt.time) -> None:
+        self.days = [first_day + dt.timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+        self.midnights = [int(dt.datetime.combine(day, dt.time(0), tzinfo=tz).timestamp()) for day in self.days]
+        self.roster_day_starts = [int(dt.datetime.combine(day, day_start, tzinfo=tz).timestamp()) for day in self.days]
+        # Per day: [00:00, NIGHT_END) night, [NIGHT_END, NIGHT_START) day, [NIGHT_START, 24:00) night
+        # Whole-second ints, like ShiftColumns, so bisect never compares int with float
+        self.bounds: list[int] = []
+        night_flags: list[int] = []
+        weekend_flags: list[int] = []
+        for day, midnight in zip(self.days, self.midnights):
+            weekend = 1 if day.weekday() >= 5 else 0
+            self.bounds.extend(
+                (
+                    midnight,
+                    int(dt.datetime.combine(day, NIGHT_END, tzinfo=tz).timestamp()),
+                    int(dt.datetime.combine(day, NIGHT_START, tzinfo=tz).timestamp()),
+                )
+            )
+            night_flags.extend((1, 0, 1))
+            weekend_flags.extend((weekend, weekend, weekend))
+        self.bounds.append(int(dt.datetime.combine(last_day + dt.timedelta(days=1), dt.time(0), tzinfo=tz).timestamp()))
+        night_flags.append(0)
+        weekend_flags.append(0)
+        self.night_flags = night_flags
+        self.weekend_flags = weekend_flags
+        self.night_before = self._running(night_flags)
+        self.weekend_before = self._running(weekend_flags)
+
+    @classmethod
+    def covering(cls, first: float, last: float, tz: dt.tzinfo, day_start: dt.time) -> "HoursGrid":
+        # A day of slack either side keeps roster days that began the previous evening inside the grid
+        first_day = dt.datetime.fromtimestamp(first, tz).date() - dt.timedelta(days=1)
+        last_day = dt.datetime.fromtimestamp(last, tz).date() + dt.timedelta(days=1)
+        return cls(first_day, last_day, tz, day_start)
+
+    def _running(self, flags: list[int]) -> list[int]:
+        totals = [0]
+        for index in range(1, len(self.bounds)):
+            totals.append(totals[-1] + flags[index - 1] * (self.bounds[index] - self.bounds[index - 1]))
+        return totals
+
+    def night_weekend_minutes(self, starts: Iterable[float], ends: Iterable[float]) -> tuple[list[int], list[int]]:
+        """Night and weekend minutes of each [start, end), one bisect per endpoint."""
+        bounds, right = self.bounds, bisect.bisect_right
+        night_flags, night_before = self.night_flags, self.night_before
+        weekend_flags, weekend_before = self.weekend_flags, self.weekend_before
+        nights: list[int] = []
+        weekends: list[int] = []
+        for start, end in zip(starts, ends):
+            first = right(bounds, start) - 1
+            last = right(bounds, end) - 1
+            into_first = start - bounds[first]
+            into_last = end - bounds[last]
+            nights.append(round((
+                night_before[last] + night_flags[last] * into_last
+                - night_before[first] - night_flags[first] * into_first
+            ) / 60))
+            weekends.append(round((
+                weekend_before[last] + weekend_flags[last] * into_last
+                - weekend_before[first] - weekend_flags[first] * into_first
+            ) / 60))
+        return nights, weekends
+
+    def local_days(self, moments: Iterable[float]) -> list[dt.date]:
+        days, midnights, right = self.days, self.midnights, bisect.bisect_right
+        return [days[right(midnights, moment) - 1] for moment in moments]
+
+    def roster_days(self, moments: Iterable[float]) -> list[dt.date]:
+        days, starts, right = self.days, self.roster_day_starts, bisect.bisect_right
+        return [days[right(starts, moment) - 1] for moment in moments]
+
+
+@dataclass(frozen=True)
+class ShiftColumns:
+    """Shift hours as parallel columns of epoch seconds, the shape aggregate_hours() works on."""
+
+    starts: array
+    ends: array
+    break_minutes: array
+    staff: list[str]
+    roles: list[str]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[list[Any]]) -> "ShiftColumns":
+        # Rows are [staff, role, start, end, break minutes], as HoursStore persists them
+        columns = cls(array("q"), array("q"), array("q"), [], [])
+        for staff, role, start, end, break_minutes in rows:
+            columns.staff.append(sys.intern(staff))
+            columns.roles.append(sys.intern(role))
+            columns.starts.append(start)
+            columns.ends.append(end)
+            columns.break_minutes.append(break_minutes)
+        return columns
+
+    @classmethod
+    def from_shifts(cls, shifts: list[ShiftEvent]) -> "ShiftColumns":
+        return cls.from_rows(hours_rows(shifts))
+
+
+def hours_rows(shifts: list[ShiftEvent]) -> list[list[Any]]:
+    return [
+        [
+            shift.staff_name or shift.staff_member_id,
+            shift.role_name or "Unassigned",
+            int(shift.start.timestamp()),
+            int(shift.end.timestamp()),
+            shift.break_minutes,
+        ]
+        for shift in shifts
+    ]
+
+
+class HoursStore:
+    """Venue-wide shift rows per roster week, so the hours report spans history and not just the fetch window."""
+
+    def __init__(self, company_id: str, weeks: dict[str, list[list[Any]]] | None = None) -> None:
+        self.company_id = company_id
+        self.weeks = weeks or {}
+
+    @classmethod
+    def load(cls, path: Path, company_id: str) -> "HoursStore":
+        if not path.exists():
+            return cls(company_id)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return cls(company_id)
+        if not isinstance(data, dict) or data.get("companyId") != company_id or not isinstance(data.get("weeks"), dict):
+            return cls(company_id)
+        return cls(company_id, data["weeks"])
+
+    def save(self, path: Path) -> None:
+        path.write_text(
+            json.dumps({"companyId": self.company_id, "weeks": self.weeks}, ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8",
+        )
+
+    def record_window(self, shifts: list[ShiftEvent], start: dt.datetime, end: dt.datetime) -> None:
+        """Replace every roster week of [start, end) with the shifts starting in it."""
+        starts = [shift.start.timestamp() for shift in shifts]
+        for week_start, week_end in roster_weeks(start, end):
+            first = bisect.bisect_left(starts, week_start.timestamp())
+            last = bisect.bisect_left(starts, week_end.timestamp())
+            self.weeks[week_start.isoformat()] = hours_rows(shifts[first:last])
+
+    def retain(self, start: dt.datetime, end: dt.datetime) -> None:
+        """Keep only weeks starting in [start, end); past weeks otherwise stay, as they can no longer change."""
+        self.weeks = {
+            key: rows for key, rows in self.weeks.items() if start <= dt.datetime.fromisoformat(key) < end
+        }
+
+    def columns(self) -> ShiftColumns:
+        return ShiftColumns.from_rows(row for key in sorted(self.weeks) for row in self.weeks[key])
+
+
+@dataclass(frozen=True)
+class HoursAggregate:
+    total: HoursBucket
+    weeks: dict[dt.date, HoursBucket]
+    months: dict[tuple[int, int], HoursBucket]
+    roles: dict[str, HoursBucket]
+    staff: dict[str, HoursBucket]
+
+
+def aggregate_hours(columns: ShiftColumns, preferences: Preferences) -> HoursAggregate:
+    """Bucket rostered minutes into totals, roster weeks, calendar months, roles and staff.
+
+    Works column-wise: per-shift minutes, breaks and night/weekend splits are computed as whole
+    lists against an HoursGrid, then each grouping sums those lists over its members' indices.
+    """
+    if not columns.starts:
+        return HoursAggregate(total=HoursBucket(), weeks={}, months={}, roles={}, staff={})
+    tz = ZoneInfo(preferences.timezone)
+    grid = HoursGrid.covering(min(columns.starts), max(columns.ends), tz, preferences.day_start)
+    week_start_py = api_weekday_to_python(preferences.week_start)
+    week_of = {day: day - dt.timedelta(days=(day.weekday() - week_start_py) % 7) for day in grid.days}
+
+    minutes = [max(0, (end - start) // 60) for start, end in zip(columns.starts, columns.ends)]
+    breaks = list(map(min, columns.break_minutes, minutes))
+    nights, weekends = grid.night_weekend_minutes(columns.starts, columns.ends)
+    values = (minutes, breaks, nights, weekends)
+
+    def buckets(keys: Iterable[Any]) -> dict[Any, HoursBucket]:
+        members: dict[Any, list[int]] = {}
+        for index, key in enumerate(keys):
+            members.setdefault(key, []).append(index)
+        return {
+            key: HoursBucket(len(indices), *(sum(map(column.__getitem__, indices)) for column in values))
+            for key, indices in members.items()
+        }
+
+    return HoursAggregate(
+        total=HoursBucket(len(minutes), *map(sum, values)),
+        weeks=buckets(week_of[day] for day in grid.roster_days(columns.starts)),
+        months=buckets((day.year, day.month) for day in grid.local_days(columns.starts)),
+        roles=buckets(columns.roles),
+        staff=buckets(columns.staff),
+    )
+
+
+def _format_hours_bucket(label: str, bucket: HoursBucket) -> str:
+    return (
+        f"{label}: {bucket.shifts} shift(s), "
+        f"{bucket.minutes / 60:.2f}h rostered, "
+        f"{(bucket.minutes - bucket.break_minutes) / 60:.2f}h after breaks, "
+        f"{bucket.night_minutes / 60:.2f}h night, "
+        f"{bucket.weekend_minutes / 60:.2f}h weekend"
+    )
+
+
+def render_hours_report(columns: ShiftColumns, preferences: Preferences) -> str:
+    """Venue-wide hours over every stored roster week, from the oldest backfilled week onwards."""
+    tz = ZoneInfo(preferences.timezone)
+    if not columns.starts:
+        return f"Rostered hours for all staff ({preferences.timezone})\nNo rostered hours found.\n"
+    title = (
+        f"Rostered hours for all staff, "
+        f"{dt.datetime.fromtimestamp(min(columns.starts), tz):%d/%m/%Y} to "
+        f"{dt.datetime.fromtimestamp(max(columns.ends), tz):%d/%m/%Y} ({preferences.timezone})"
+    )
+
+    hours = aggregate_hours(columns, preferences)
+    lines = [title, _format_hours_bucket("Total", hours.total), "", "By week:"]
+    for week_start in sorted(hours.weeks):
+        lines.append(_format_hours_bucket(f"Week of {week_start:%a %d/%m/%Y}", hours.weeks[week_start]))
+    lines.extend(["", "By month:"])
+    for year, month in sorted(hours.months):
+        lines.append(_format_hours_bucket(f"{dt.date(year, month, 1):%B %Y}", hours.months[(year, month)]))
+    lines.extend(["", "By role:"])
+    for role in sorted(hours.roles, key=str.lower):
+        lines.append(_format_hours_bucket(role, hours.roles[role]))
+    lines.extend(["", "By staff:"])
+    for name in sorted(hours.staff, key=str.lower):
+        lines.append(_format_hours_bucket(name, hours.staff[name]))
+    return "\n".join(lines) + "\n"
+
+
+def shift_record(
+    shift: ShiftEvent, coworkers: list[tuple[str, str]], leave: LeaveNotes | None = None
+) -> dict[str, Any]:
+    leave = leave or LeaveNotes()
+    return {
+        "id": shift.shift_id,
+        "staffMemberId": shift.staff_member_id,
+        "staffName": shift.staff_name,
+        "roleName": shift.role_name,
+        "jobs": list(shift.jobs),
+        "start": shift.start.isoformat(),
+        "end": shift.end.isoformat(),
+        "durationMinutes": int((shift.end - shift.start).total_seconds() // 60),
+        "breakMinutes": shift.break_minutes,
+        "breaks": list(shift.breaks_display),
+        "workingWith": [{"name": name, "roleName": role} for name, role in coworkers],
+        "approvedLeave": list(leave.own),
+        "staffOnLeave": [{"name": name, "leave": label} for name, label in leave.others],
+    }
+
+
+class JsonFeedWriter:
+    """Streams a {"company", "windowStart", "shifts": [...]} document one shift at a time."""
+
+    def __init__(self, stream: TextIO, company_name: str, window_start: dt.datetime) -> None:
+        self.stream = stream
+        self.company_name = company_name
+        self.window_start = window_start
+        self.count = 0
+
+    def begin(self) -> None:
+        self.stream.write("{\n")
+        self.stream.write(f'  "company": {json.dumps(self.company_name, ensure_ascii=False)},\n')
+        self.stream.write(f'  "windowStart": {json.dumps(self.window_start.isoformat())},\n')
+        self.stream.write('  "shifts": [')
+
+    def write(self, shift: ShiftEvent, coworkers: list[tuple[str, str]], leave: LeaveNotes | None = None) -> None:
+        self.stream.write(",\n    " if self.count else "\n    ")
+        self.stream.write(json.dumps(shift_record(shift, coworkers, leave), ensure_ascii=False))
+        self.count += 1
+
+    def end(self) -> None:
+        self.stream.write("\n  ]\n}\n" if self.count else "]\n}\n")
+
+
+class CsvFeedWriter:
+    """Streams one CSV row per shift; list fields are joined with "; "."""
+
+    FIELDS = (
+        "id", "staffMemberId", "staffName", "roleName", "jobs", "start", "end",
+        "durationMinutes", "breakMinutes", "breaks", "workingWith", "approvedLeave", "staffOnLeave",
+    )
+
+    def __init__(self, stream: TextIO) -> None:
+        self.writer = csv.writer(stream, lineterminator="\n")
+
+    def begin(self) -> None:
+        self.writer.writerow(self.FIELDS)
+
+    def write(self, shift: ShiftEvent, coworkers: list[tuple[str, str]], leave: LeaveNotes | None = None) -> None:
+        leave = leave or LeaveNotes()
+        record = shift_record(shift, coworkers, leave)
+        record["jobs"] = "; ".join(record["jobs"])
+        record["breaks"] = "; ".join(record["breaks"])
+        record["workingWith"] = "; ".join(f"{name} ({role})" for name, role in coworkers)
+        record["approvedLeave"] = "; ".join(leave.own)
+        record["staffOnLeave"] = "; ".join(f"{name} ({label})" for name, label in leave.others)
+        self.writer.writerow([record[field] for field in self.FIELDS])
+
+    def end(self) -> None:
+        pass
+
+
+def render_shift_feeds(
+    shifts: list[ShiftEvent],
+    formats: frozenset[str],
+    company_name: str,
+    window_start: dt.datetime,
+    overlap: CoworkerOverlap | None = None,
+    leave_index: LeaveIndex | None = None,
+) -> dict[Path, str]:
+    """Render the enabled machine-readable feeds in a single pass over shifts."""
+    streams: dict[Path, io.StringIO] = {}
+    writers: list[JsonFeedWriter | CsvFeedWriter] = []
+    if "json" in formats:
+        streams[PUBLIC_JSON_PATH] = io.StringIO()
+        writers.append(JsonFeedWriter(streams[PUBLIC_JSON_PATH], company_name, window_start))
+    if "csv" in formats:
+        streams[PUBLIC_CSV_PATH] = io.StringIO()
+        writers.append(CsvFeedWriter(streams[PUBLIC_CSV_PATH]))
+    if not writers:
+        return {}
+
+    for writer in writers:
+        writer.begin()
+    for shift in shifts:
+        coworkers = overlap.coworkers_by_shift.get(shift.shift_id, []) if overlap is not None else []
+        leave = leave_notes(leave_index, shift) if leave_index is not None else None
+        for writer in writers:
+            writer.write(shift, coworkers, leave)
+    for writer in writers:
+        writer.end()
+    return {path: stream.getvalue() for path, stream in streams.items()}
+
+
+INDEX_LINK_LABELS = {
+    PUBLIC_OUTPUT_PATH: f"Download {CALENDAR_NAME}",
+    PUBLIC_JSON_PATH: "Shifts as JSON",
+    PUBLIC_CSV_PATH: "Shifts as CSV",
+}
+
+
+def render_index_html(published: list[Path]) -> str:
+    """Landing page linking only the feeds this run actually publishes."""
+    links = [
+        f"  <p><a href=\"{path.name}\">{label}</a></p>"
+        for path, label in INDEX_LINK_LABELS.items()
+        if path in published
+    ]
+    return "\n".join(
+        [
+            "<!doctype html>",
+            "<html lang=\"en\">",
+            "<head>",
+            "  <meta charset=\"utf-8\">",
+            "  <meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">",
+            f"  <title>{CALENDAR_NAME}</title>",
+            "</head>",
+            "<body>",
+            *links,
+            "</body>",
+            "</html>",
+            "",
+        ]
     )
-    PUBLIC_NOJEKYLL_PATH.write_text("", encoding="utf-8")
+
+
+class FileSink:
+    """Writes outputs under root, leaving files that already hold identical bytes untouched."""
+
+    def __init__(self, root: Path = Path(".")) -> None:
+        self.root = root
+
+    def target(self, name: Path) -> Path:
+        return self.root / name
+
+    def encode(self, content: bytes) -> bytes:
+        return content
+
+    def write(self, names: list[Path], content: bytes) -> int:
+        data = self.encode(content)
+        written = 0
+        for name in names:
+            path = self.target(name)
+            if path.exists() and path.stat().st_size == len(data) and path.read_bytes() == data:
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            written += 1
+        return written
+
+
+class GzipSink(FileSink):
+    """Writes name.gz; mtime is pinned so unchanged content compresses to identical bytes."""
+
+    def target(self, name: Path) -> Path:
+        return self.root / name.with_name(name.name + ".gz")
+
+    def encode(self, content: bytes) -> bytes:
+        return gzip.compress(content, mtime=0)
+
+
+class EmployeeTreeSink(FileSink):
+    """Writes outputs under root/<employee-slug>/ so one tree can hold every employee."""
+
+    def __init__(self, root: Path, employee_name: str) -> None:
+        slug = re.sub(r"[^a-z0-9]+", "-", employee_name.lower()).strip("-") or "employee"
+        super().__init__(root / slug)
+
+
+class StdoutSink:
+    """Prints each distinct output once, headed by every name that shares it."""
+
+    def __init__(self, stream: TextIO | None = None) -> None:
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    def write(self, names: list[Path], content: bytes) -> int:
+        stream = self.stream or sys.stdout
+        with self.lock:
+            stream.write(f"==> {', '.join(str(name) for name in names)} <==\n")
+            stream.write(content.decode("utf-8"))
+            stream.flush()
+        # Nothing lands on disk, so prints do not count towards files written
+        return 0
+
+
+OutputSink = FileSink | StdoutSink
+
+
+def load_output_sinks(employee_name: str) -> list[OutputSink]:
+    """Parse ROSTER_OUTPUT_SINKS, e.g. "local,gzip:dist,employee:rosters,stdout"."""
+    raw = os.environ.get("ROSTER_OUTPUT_SINKS", "").strip() or "local"
+    sinks: list[OutputSink] = []
+    for spec in (part.strip() for part in raw.split(",")):
+        if not spec:
+            continue
+        kind, _, location = spec.partition(":")
+        root = Path(location or ".")
+        if kind == "local":
+            sinks.append(FileSink(root))
+        elif kind == "gzip":
+            sinks.append(GzipSink(root))
+        elif kind == "employee":
+            sinks.append(EmployeeTreeSink(root, employee_name))
+        elif kind == "stdout":
+            sinks.append(StdoutSink())
+        else:
+            raise ScraperError(f"ROSTER_OUTPUT_SINKS has unknown sink {kind!r}; choose from local, gzip, employee, stdout")
+    return sinks
+
+
+def archive_sink(sinks: list[OutputSink]) -> FileSink | None:
+    """The sink whose roster.ics seeds the next run; per-employee trees win so histories never mix."""
+    for kind in (EmployeeTreeSink, FileSink):
+        for sink in sinks:
+            if type(sink) is kind:
+                return sink
+    return None
+
+
+def status_stream(sinks: list[OutputSink]) -> TextIO:
+    """Where progress lines go: stderr when a stdout sink owns stdout, so its stream pipes cleanly."""
+    return sys.stderr if any(isinstance(sink, StdoutSink) for sink in sinks) else sys.stdout
+
+
+def write_to_sinks(outputs: dict[Path, str], sinks: list[OutputSink], max_workers: int = 8) -> int:
+    """Encode each distinct output once and hand it to every sink concurrently; returns files written."""
+    groups: dict[bytes, list[Path]] = {}
+    for name, text in outputs.items():
+        groups.setdefault(text.encode("utf-8"), []).append(name)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(sink.write, names, content): names
+            for sink in sinks
+            for content, names in groups.items()
+        }
+        written = 0
+        for future, names in futures.items():
+            try:
+                written += future.result()
+            except OSError as exc:
+                raise ScraperError(f"Failed to write {', '.join(str(name) for name in names)}: {exc}") from exc
+    return written
+
+
+def write_outputs(
+    calendar_text: str | None,
+    summary_text: str,
+    hours_text: str,
+    feeds: dict[Path, str] | None = None,
+    sinks: list[OutputSink] | None = None,
+) -> int:
+    outputs: dict[Path, str] = {}
+    if calendar_text is not None:
+        outputs[OUTPUT_PATH] = calendar_text
+        outputs[PUBLIC_OUTPUT_PATH] = calendar_text
+    outputs[SUMMARY_PATH] = summary_text
+    outputs[HOURS_PATH] = hours_text
+    outputs.update(feeds or {})
+    outputs[PUBLIC_INDEX_PATH] = render_index_html(list(outputs))
+    outputs[PUBLIC_NOJEKYLL_PATH] = ""
+    return write_to_sinks(outputs, sinks if sinks is not None else [FileSink()])
+
+
+class BackfillState:
+    """Past roster weeks already merged into the archive; they can no longer change."""
+
+    def __init__(self, company_id: str, employee_name: str, complete_weeks: set[str] | None = None) -> None:
+        self.company_id = company_id
+        self.employee_name = employee_name
+        self.complete_weeks = complete_weeks or set()
+
+    @classmethod
+    def load(cls, path: Path, company_id: str, employee_name: str) -> "BackfillState":
+        if not path.exists():
+            return cls(company_id, employee_name)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return cls(company_id, employee_name)
+        if data.get("companyId") != company_id or data.get("employee") != employee_name:
+            return cls(company_id, employee_name)
+        return cls(company_id, employee_name, set(data.get("completeWeeks") or []))
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps(
+                {
+                    "companyId": self.company_id,
+                    "employee": self.employee_name,
+                    "completeWeeks": sorted(self.complete_weeks),
+                },
+                indent=2,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+
+
+def backfill_history(
+    config: PublicRosterConfig,
+    employee_name: str,
+    company_name: str,
+    start: dt.datetime,
+    stop: dt.datetime,
+    state: BackfillState,
+    state_path: Path,
+    archive_path: Path | None,
+    tz: dt.tzinfo,
+    hours: HoursStore,
+    hours_path: Path,
+    role_names: frozenset[str] = COWORKER_ALLOWED_ROLES,
+    log: TextIO | None = None,
+) -> int:
+    """Fetch past weeks one at a time into the archive and the hours store, checkpointing after each week.
+
+    A week is skipped once state has it (or there is no archive to fill) and the hours store
+    has it, so an interrupted backfill resumes where it stopped. A week from before the employee
+    joined is checkpointed with no shifts. A failed fetch ends the backfill with a warning rather
+    than the run, so the current roster is still written. Returns the number of weeks fetched.
+    """
+    fetched = 0
+    for week_start, week_end in roster_weeks(start, stop):
+        key = week_start.isoformat()
+        archived = archive_path is None or key in state.complete_weeks
+        counted = key in hours.weeks
+        if archived and counted:
+            continue
+        try:
+            payload = fetch_roster_payload(config, week_start, week_end)
+            venue_shifts = build_shift_events(payload)
+            employee_id = next((sid for sid, name in staff_names(payload).items() if name == employee_name), None)
+            shifts = build_shift_events(payload, employee_id) if employee_id is not None else []
+        except ScraperError as exc:
+            print(f"WARNING: backfill stopped at week starting {key}: {exc}", file=sys.stderr)
+            break
+        if not counted:
+            hours.record_window(venue_shifts, week_start, week_end)
+            hours.save(hours_path)
+        if not archived:
+            if employee_id is not None:
+                role_index = build_role_index(payload, role_names)
+                calendar_text = render_calendar(
+                    shifts, company_name, payload, employee_id,
+                    generated_at=week_start.astimezone(dt.timezone.utc),
+                    existing_path=archive_path,
+                    overlap=build_coworker_overlap(payload, role_index),
+                    leave_index=build_leave_index(payload, tz, role_index),
+                )
+                archive_path.parent.mkdir(parents=True, exist_ok=True)
+                archive_path.write_text(calendar_text, encoding="utf-8", newline="")
+            state.complete_weeks.add(key)
+            state.save(state_path)
+        fetched += 1
+        print(
+            f"Backfilled week starting {key}: {len(shifts)} shift(s), {len(hours.weeks[key])} venue shift(s)",
+            file=log or sys.stdout,
+        )
+    return fetched
+
+
+def write_overlap_exports(overlap: CoworkerOverlap, directory: Path) -> int:
+    outputs = {
+        Path(OVERLAP_CSV_NAME): render_overlap_csv(overlap),
+        Path(OVERLAP_JSON_NAME): render_overlap_json(overlap),
+    }
+    return write_to_sinks(outputs, [FileSink(directory)])
 
 
 def main() -> int:
     public_roster_url, employee_name, weeks_ahead, weeks_back = load_settings()
+    export_formats = load_export_formats()
+    output_sinks = load_output_sinks(employee_name)
+    log = status_stream(output_sinks)
+    archive = archive_sink(output_sinks)
+    if archive is None and "ics" in export_formats:
+        raise ScraperError(
+            "ROSTER_OUTPUT_SINKS needs a local or employee sink to keep the calendar archive between runs"
+        )
     config = parse_public_roster_url(public_roster_url)
-    preferences = fetch_preferences(config)
-    start, end = calculate_window(preferences, weeks_ahead=weeks_ahead, weeks_back=weeks_back)
-    payload = fetch_roster_payload(config, start, end)
+    now = dt.datetime.now(dt.timezone.utc)
+    # Only the current and future weeks can still change; history is backfilled week by week
+    preferences, start, end, payload = fetch_roster_with_preferences(config, weeks_ahead, now)
+    company_name = preferences.company_name.strip() or "Roster"
+    role_names = load_coworker_roles()
+    company_tz = ZoneInfo(preferences.timezone)
+    history_start, _ = calculate_window(preferences, now=now, weeks_ahead=weeks_ahead, weeks_back=weeks_back)
+    hours_store = HoursStore.load(HOURS_STORE_PATH, config.company_id)
+    hours_store.retain(min(history_start, start - HOURS_HISTORY), end)
+    if history_start < start:
+        archive_path = archive.target(PUBLIC_OUTPUT_PATH) if "ics" in export_formats else None
+        state_path = (archive or FileSink()).target(BACKFILL_STATE_PATH)
+        state = BackfillState.load(state_path, config.company_id, employee_name)
+        backfilled = backfill_history(
+            config, employee_name, company_name, history_start, start, state, state_path,
+            archive_path, company_tz, hours_store, HOURS_STORE_PATH, role_names, log,
+        )
+        print(f"Backfill: {backfilled} week(s) fetched, {len(state.complete_weeks)} week(s) archived", file=log)
     shifts = extract_employee_shifts(payload, employee_name)
     employee_id = get_employee_id(payload, employee_name)
-    company_name = preferences.company_name.strip() or "Roster"
     calendar_dtstamp = start.astimezone(dt.timezone.utc)
-    calendar_text = render_calendar(
-        shifts, company_name, payload, employee_id,
-        generated_at=calendar_dtstamp,
-        existing_path=PUBLIC_OUTPUT_PATH,
-    )
-    summary_text = render_summary(shifts, company_name)
-    write_outputs(calendar_text, summary_text)
+    role_index = build_role_index(payload, role_names)
+    overlap = build_coworker_overlap(payload, role_index)
+    leave_index = build_leave_index(payload, company_tz, role_index)
+    render_cache = RenderCache.load(RENDER_CACHE_PATH)
+    calendar_text: str | None = None
+    if "ics" in export_formats:
+        calendar_text = render_calendar(
+            shifts, company_name, payload, employee_id,
+            generated_at=calendar_dtstamp,
+            existing_path=archive.target(PUBLIC_OUTPUT_PATH),
+            cache=render_cache,
+            overlap=overlap,
+            leave_index=leave_index,
+        )
+        render_cache.save(RENDER_CACHE_PATH)
+    summary_text = render_summary(shifts, company_name, leave_index)
+    hours_store.record_window(build_shift_events(payload), start, end)
+    hours_store.save(HOURS_STORE_PATH)
+    hours_text = render_hours_report(hours_store.columns(), preferences)
+    feeds = render_shift_feeds(shifts, export_formats, company_name, start, overlap, leave_index)
+    written = write_outputs(calendar_text, summary_text, hours_text, feeds, output_sinks)
+    overlap_dir = os.environ.get("ROSTER_OVERLAP_EXPORT", "").strip()
+    if overlap_dir:
+        written += write_overlap_exports(overlap, Path(overlap_dir))
+    generated = ([OUTPUT_PATH] if calendar_text is not None else []) + list(feeds)
     print(
-        f"Generated {OUTPUT_PATH} for {employee_name}: {len(shifts)} shift(s) "
-        f"between {start.isoformat()} and {end.isoformat()}"
+        f"Generated {', '.join(str(path) for path in generated) or 'no roster feeds'} "
+        f"for {employee_name}: {len(shifts)} shift(s) "
+        f"between {start.isoformat()} and {end.isoformat()}",
+        file=log,
     )
+    print(f"Render cache: {render_cache.hits} hit(s), {render_cache.misses} miss(es)", file=log)
+    print(f"Outputs: {written} file(s) written, unchanged files skipped", file=log)
     return 0
 
 
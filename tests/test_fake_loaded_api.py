@@ -0,0 +1,52 @@
+import datetime as dt
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import fake_loaded_api
+import scraper
+
+CONFIG = scraper.PublicRosterConfig(company_id="company-123", token="token-456")
+
+
+class FakeLoadedApiTests(unittest.TestCase):
+    def test_scraper_fetches_preferences_and_roster_from_fake_server(self):
+        with fake_loaded_api.FakeLoadedServer(fake_loaded_api.FakeApiConfig(staff_count=5, shifts_per_day=4)) as server:
+            with mock.patch.object(scraper, "API_BASE_URL", server.base_url):
+                preferences = scraper.fetch_preferences(CONFIG)
+                now = dt.datetime(2026, 3, 10, 12, 0, tzinfo=dt.timezone.utc)
+                start, end = scraper.calculate_window(preferences, now=now, weeks_ahead=1)
+                payload = scraper.fetch_roster_payload(CONFIG, start, end)
+
+        self.assertEqual(preferences.timezone, "Pacific/Auckland")
+        self.assertEqual(len(payload["staff"]), 5)
+        self.assertEqual(len(payload["rosteredShifts"]), 14 * 4)
+        shifts = scraper.extract_employee_shifts(payload, scraper.DEFAULT_EMPLOYEE_NAME)
+        self.assertTrue(shifts)
+
+    def test_throttled_requests_surface_as_scraper_error(self):
+        with fake_loaded_api.FakeLoadedServer(fake_loaded_api.FakeApiConfig(throttle_rate=1.0)) as server:
+            with self.assertRaises(scraper.ScraperError) as ctx:
+                scraper.http_get_json(fake_loaded_api.PREFERENCES_PATH, {}, retries=1, base_url=server.base_url)
+        self.assertIn("429", str(ctx.exception))
+
+    def test_replays_recorded_response(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            recordings = Path(tmp)
+            params = {"companyId": "company-123"}
+            recorded = {"weekStart": 0, "dayStart": "04:00:00", "localeTimeZone": "UTC", "companyName": "Recorded"}
+            key = fake_loaded_api.recording_key(fake_loaded_api.PREFERENCES_PATH, params)
+            (recordings / key).write_text(json.dumps(recorded), encoding="utf-8")
+
+            config = fake_loaded_api.FakeApiConfig(recordings=recordings)
+            with fake_loaded_api.FakeLoadedServer(config) as server:
+                body = scraper.http_get_json(
+                    fake_loaded_api.PREFERENCES_PATH, {**params, "token": "x"}, base_url=server.base_url
+                )
+        self.assertEqual(body["companyName"], "Recorded")
+
+
+if __name__ == "__main__":
+    unittest.main()
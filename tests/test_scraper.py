@@ -1,7 +1,12 @@
+import csv
 import datetime as dt
+import io
 import json
+import os
+import sys
 import unittest
 from pathlib import Path
+from unittest import mock
 
 import scraper
 
@@ -43,6 +48,164 @@ class WindowCalculationTests(unittest.TestCase):
         self.assertEqual(end.isoformat(), "2026-04-13T05:00:00+12:00")
 
 
+class PreferencesCacheTests(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = Path(self.tmp.name) / "preferences.json"
+        self.config = scraper.PublicRosterConfig(company_id="company-123", token="token-456")
+        self.preferences = scraper.Preferences(
+            week_start=1,
+            day_start=dt.time(5, 0, 0),
+            timezone="Pacific/Auckland",
+            company_name="Chou Chou",
+        )
+        self.now = dt.datetime(2026, 3, 10, 12, 0, tzinfo=dt.timezone.utc)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cached_preferences_respect_ttl_and_company(self):
+        scraper.save_cached_preferences(self.cache_path, "company-123", self.preferences, self.now)
+        later = self.now + scraper.PREFERENCES_CACHE_TTL
+        self.assertEqual(scraper.load_cached_preferences(self.cache_path, "company-123", later), self.preferences)
+        expired = later + dt.timedelta(seconds=1)
+        self.assertIsNone(scraper.load_cached_preferences(self.cache_path, "company-123", expired))
+        self.assertIsNone(scraper.load_cached_preferences(self.cache_path, "other-company", self.now))
+
+    def test_cold_cache_fetches_preferences_first_and_saves_them(self):
+        with mock.patch.object(scraper, "fetch_preferences", return_value=self.preferences), \
+                mock.patch.object(scraper, "fetch_roster_payload", return_value={}) as fetch_roster:
+            preferences, start, end, _ = scraper.fetch_roster_with_preferences(
+                self.config, 4, self.now, self.cache_path
+            )
+        self.assertEqual(preferences, self.preferences)
+        fetch_roster.assert_called_once_with(self.config, start, end)
+        self.assertEqual(scraper.load_cached_preferences(self.cache_path, "company-123", self.now), self.preferences)
+
+    def test_warm_cache_fetches_roster_once_when_window_is_unchanged(self):
+        scraper.save_cached_preferences(self.cache_path, "company-123", self.preferences, self.now)
+        renamed = scraper.Preferences(1, dt.time(5, 0, 0), "Pacific/Auckland", "Chou Chou Bar")
+        with mock.patch.object(scraper, "fetch_preferences", return_value=renamed), \
+                mock.patch.object(scraper, "fetch_roster_payload", return_value={}) as fetch_roster:
+            preferences, _, _, _ = scraper.fetch_roster_with_preferences(self.config, 4, self.now, self.cache_path)
+        self.assertEqual(preferences.company_name, "Chou Chou Bar")
+        self.assertEqual(fetch_roster.call_count, 1)
+
+    def test_warm_cache_refetches_when_refreshed_window_moves(self):
+        scraper.save_cached_preferences(self.cache_path, "company-123", self.preferences, self.now)
+        moved = scraper.Preferences(3, dt.time(5, 0, 0), "Pacific/Auckland", "Chou Chou")
+        with mock.patch.object(scraper, "fetch_preferences", return_value=moved), \
+                mock.patch.object(scraper, "fetch_roster_payload", return_value={}) as fetch_roster:
+            _, start, end, _ = scraper.fetch_roster_with_preferences(self.config, 4, self.now, self.cache_path)
+        self.assertEqual(fetch_roster.call_count, 2)
+        self.assertEqual((start, end), scraper.calculate_window(moved, now=self.now, weeks_ahead=4))
+
+    def test_warm_cache_survives_failed_refresh(self):
+        scraper.save_cached_preferences(self.cache_path, "company-123", self.preferences, self.now)
+        with mock.patch.object(scraper, "fetch_preferences", side_effect=scraper.ScraperError("down")), \
+                mock.patch.object(scraper, "fetch_roster_payload", return_value={}), \
+                mock.patch("sys.stderr", new_callable=io.StringIO):
+            preferences, _, _, _ = scraper.fetch_roster_with_preferences(self.config, 4, self.now, self.cache_path)
+        self.assertEqual(preferences, self.preferences)
+
+
+class BackfillTests(unittest.TestCase):
+    def setUp(self):
+        self.payload = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+        self.preferences = scraper.Preferences(
+            week_start=1,
+            day_start=dt.time(5, 0, 0),
+            timezone="Pacific/Auckland",
+            company_name="Chou Chou",
+        )
+        self.config = scraper.PublicRosterConfig(company_id="company-123", token="token-456")
+        self.now = dt.datetime(2026, 3, 25, 12, 0, tzinfo=dt.timezone.utc)
+        self.tz = scraper.ZoneInfo("Pacific/Auckland")
+
+    def test_roster_weeks_split_window_into_weeks(self):
+        start, end = scraper.calculate_window(self.preferences, now=self.now, weeks_ahead=1, weeks_back=2)
+        weeks = scraper.roster_weeks(start, end)
+        self.assertEqual(len(weeks), 4)
+        self.assertEqual(weeks[0][0], start)
+        self.assertEqual(weeks[-1][1], end)
+        self.assertTrue(all(a_end == b_start for (_, a_end), (b_start, _) in zip(weeks, weeks[1:])))
+
+    def test_backfill_checkpoints_and_skips_completed_weeks(self):
+        import tempfile
+        history_start, _ = scraper.calculate_window(self.preferences, now=self.now, weeks_back=3)
+        current_start, _ = scraper.calculate_window(self.preferences, now=self.now)
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            state_path = tmp_path / "backfill.json"
+            archive_path = tmp_path / "public" / "roster.ics"
+            hours_path = tmp_path / "hours.json"
+            hours = scraper.HoursStore("company-123")
+            with mock.patch.object(scraper, "fetch_roster_payload", return_value=self.payload) as fetch:
+                fetch.side_effect = [self.payload, scraper.ScraperError("boom")]
+                state = scraper.BackfillState("company-123", "Cristian Rus")
+                with mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+                    fetched = scraper.backfill_history(
+                        self.config, "Cristian Rus", "Chou Chou", history_start, current_start, state, state_path,
+                        archive_path, self.tz, hours, hours_path,
+                    )
+                self.assertEqual(fetched, 1)
+                self.assertIn("WARNING: backfill stopped at week starting", stderr.getvalue())
+                resumed = scraper.BackfillState.load(state_path, "company-123", "Cristian Rus")
+                self.assertEqual(resumed.complete_weeks, {history_start.isoformat()})
+
+                fetch.side_effect = None
+                fetched = scraper.backfill_history(
+                    self.config, "Cristian Rus", "Chou Chou", history_start, current_start, resumed, state_path,
+                    archive_path, self.tz, hours, hours_path,
+                )
+                self.assertEqual(fetched, 2)
+                self.assertEqual(
+                    scraper.backfill_history(
+                        self.config, "Cristian Rus", "Chou Chou", history_start, current_start, resumed, state_path,
+                        archive_path, self.tz, hours, hours_path,
+                    ),
+                    0,
+                )
+                self.assertIn("shift-002", archive_path.read_text(encoding="utf-8"))
+                stored = scraper.HoursStore.load(hours_path, "company-123")
+                self.assertEqual(len(stored.weeks), 3)
+                self.assertEqual(sum(len(rows) for rows in stored.weeks.values()), len(self.payload["rosteredShifts"]))
+
+                # Weeks missing from the hours store are refetched without touching the archive checkpoint
+                del stored.weeks[history_start.isoformat()]
+                fetched = scraper.backfill_history(
+                    self.config, "Cristian Rus", "Chou Chou", history_start, current_start, resumed, state_path,
+                    None, self.tz, stored, hours_path,
+                )
+                self.assertEqual((fetched, len(stored.weeks)), (1, 3))
+
+            other = scraper.BackfillState.load(state_path, "other-company", "Cristian Rus")
+            self.assertEqual(other.complete_weeks, set())
+
+    def test_backfill_checkpoints_weeks_before_the_employee_joined(self):
+        import tempfile
+        history_start, _ = scraper.calculate_window(self.preferences, now=self.now, weeks_back=1)
+        current_start, _ = scraper.calculate_window(self.preferences, now=self.now)
+        before_joining = json.loads(json.dumps(self.payload))
+        before_joining["staff"] = [member for member in before_joining["staff"] if member["id"] != "staff-cristian"]
+        before_joining["rosteredShifts"] = [
+            item for item in before_joining["rosteredShifts"] if item["staffMemberId"] != "staff-cristian"
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            state = scraper.BackfillState("company-123", "Cristian Rus")
+            hours = scraper.HoursStore("company-123")
+            with mock.patch.object(scraper, "fetch_roster_payload", return_value=before_joining):
+                fetched = scraper.backfill_history(
+                    self.config, "Cristian Rus", "Chou Chou", history_start, current_start, state,
+                    tmp_path / "backfill.json", tmp_path / "roster.ics", self.tz, hours, tmp_path / "hours.json",
+                )
+            self.assertEqual(fetched, 1)
+            self.assertEqual(state.complete_weeks, {history_start.isoformat()})
+            self.assertFalse((tmp_path / "roster.ics").exists())
+
+
 class PayloadTests(unittest.TestCase):
     def setUp(self):
         self.payload = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
@@ -70,6 +233,64 @@ class PayloadTests(unittest.TestCase):
         coworkers = scraper.overlapping_coworkers(self.payload, scraper.get_employee_id(self.payload, "Cristian Rus"), evening)
         self.assertEqual(coworkers, [("Alex Worker", "FOH")])
 
+    def test_role_index_resolves_allowed_roles_to_ids(self):
+        index = scraper.build_role_index(self.payload)
+        self.assertTrue({"role-foh", "role-mgr"} <= index.allowed_keys)
+        self.assertNotIn("role-kitchen", index.allowed_keys)
+        self.assertNotIn("shift-kitchen-overlap", [item["id"] for _, item in index.eligible_shifts()])
+
+    def test_coworker_filter_uses_role_id_over_role_name(self):
+        payload = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+        for item in payload["rosteredShifts"]:
+            if item["id"] == "shift-mate":
+                item["roleName"] = "Front of House"
+        evening = next(shift for shift in scraper.extract_employee_shifts(payload, "Cristian Rus") if shift.shift_id == "shift-002")
+        coworkers = scraper.overlapping_coworkers(payload, "staff-cristian", evening)
+        self.assertEqual(coworkers, [("Alex Worker", "Front of House")])
+
+    def test_coworker_roles_are_configurable(self):
+        evening = next(shift for shift in scraper.extract_employee_shifts(self.payload, "Cristian Rus") if shift.shift_id == "shift-002")
+        index = scraper.build_role_index(self.payload, frozenset({"kitchen"}))
+        coworkers = scraper.overlapping_coworkers(self.payload, "staff-cristian", evening, index)
+        self.assertEqual(coworkers, [("Pat Cook", "Kitchen")])
+        with mock.patch.dict(os.environ, {"ROSTER_COWORKER_ROLES": "Kitchen, FOH"}):
+            self.assertEqual(scraper.load_coworker_roles(), frozenset({"kitchen", "foh"}))
+
+    def test_coworker_overlap_matrix_counts_allowed_role_pairs(self):
+        overlap = scraper.build_coworker_overlap(self.payload)
+        self.assertEqual(list(overlap.cells), [("staff-cristian", "staff-mate")])
+        cell = overlap.cells[("staff-cristian", "staff-mate")]
+        self.assertEqual((round(cell.minutes), cell.shared_shifts), (180, 1))
+        csv_text = scraper.render_overlap_csv(overlap)
+        self.assertEqual(
+            csv_text.splitlines(),
+            [
+                "staffId,staffName,coworkerId,coworkerName,overlapMinutes,sharedShifts",
+                "staff-cristian,Cristian Rus,staff-mate,Alex Worker,180,1",
+            ],
+        )
+        self.assertEqual(json.loads(scraper.render_overlap_json(overlap))[0]["overlapMinutes"], 180)
+
+    def test_coworker_overlap_matches_overlapping_coworkers_per_shift(self):
+        overlap = scraper.build_coworker_overlap(self.payload)
+        employee_id = scraper.get_employee_id(self.payload, "Cristian Rus")
+        for shift in scraper.extract_employee_shifts(self.payload, "Cristian Rus"):
+            self.assertEqual(
+                overlap.coworkers_by_shift[shift.shift_id],
+                scraper.overlapping_coworkers(self.payload, employee_id, shift),
+            )
+
+    def test_coworker_fallback_reuses_overlap_role_index(self):
+        import dataclasses
+        index = scraper.build_role_index(self.payload, frozenset({"kitchen"}))
+        overlap = scraper.build_coworker_overlap(self.payload, index)
+        self.assertIs(overlap.role_index, index)
+        evening = next(shift for shift in scraper.extract_employee_shifts(self.payload, "Cristian Rus") if shift.shift_id == "shift-002")
+        unseen = dataclasses.replace(evening, shift_id="shift-not-in-payload")
+        with mock.patch.object(scraper, "build_role_index", side_effect=AssertionError("index rebuilt")):
+            coworkers = scraper._shift_coworkers(unseen, self.payload, "staff-cristian", overlap)
+        self.assertEqual(coworkers, [("Pat Cook", "Kitchen")])
+
     def test_format_shift_breaks_from_api_payload(self):
         ref = dt.datetime(2026, 3, 18, 17, 0, tzinfo=dt.timezone(dt.timedelta(hours=13)))
         lines = scraper.format_shift_breaks(
@@ -113,6 +334,318 @@ class SummaryRenderingTests(unittest.TestCase):
         self.assertIn("Event name: ChouChou", summary)
 
 
+class HoursReportTests(unittest.TestCase):
+    def setUp(self):
+        self.payload = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+        self.shifts = scraper.extract_employee_shifts(self.payload, "Cristian Rus")
+        self.preferences = scraper.Preferences(
+            week_start=1,
+            day_start=dt.time(5, 0, 0),
+            timezone="Pacific/Auckland",
+            company_name="Chou Chou",
+        )
+
+    def test_shift_break_minutes_from_break_times(self):
+        evening = next(shift for shift in self.shifts if shift.shift_id == "shift-002")
+        self.assertEqual(evening.break_minutes, 30)
+
+    def test_aggregates_totals_with_night_and_weekend_split(self):
+        hours = scraper.aggregate_hours(scraper.ShiftColumns.from_shifts(self.shifts), self.preferences)
+        self.assertEqual((hours.total.shifts, hours.total.minutes, hours.total.break_minutes), (2, 420, 30))
+        self.assertEqual(hours.total.night_minutes, 240)
+        self.assertEqual(hours.total.weekend_minutes, 0)
+        self.assertEqual(list(hours.weeks), [dt.date(2026, 3, 16)])
+        self.assertEqual(list(hours.months), [(2026, 3)])
+        self.assertEqual(hours.roles["FOH"].minutes, 420)
+        self.assertEqual(list(hours.staff), ["Cristian Rus"])
+
+    def test_build_shift_events_covers_every_staff_member(self):
+        shifts = scraper.build_shift_events(self.payload)
+        self.assertEqual(len(shifts), len(self.payload["rosteredShifts"]))
+        self.assertEqual([shift for shift in shifts if shift.staff_member_id == "staff-cristian"], self.shifts)
+        hours = scraper.aggregate_hours(scraper.ShiftColumns.from_shifts(shifts), self.preferences)
+        self.assertIn("Pat Cook", hours.staff)
+        self.assertIn("Kitchen", hours.roles)
+
+    def test_hours_grid_night_and_weekend_seconds(self):
+        tz = scraper.ZoneInfo("Pacific/Auckland")
+        start = dt.datetime(2026, 3, 20, 21, 0, tzinfo=tz).timestamp()
+        end = dt.datetime(2026, 3, 21, 1, 0, tzinfo=tz).timestamp()
+        grid = scraper.HoursGrid.covering(start, end, tz, dt.time(5, 0))
+        self.assertEqual(grid.night_weekend_minutes([start], [end]), ([180], [60]))
+        self.assertEqual(grid.roster_days([end]), [dt.date(2026, 3, 20)])
+        self.assertEqual(grid.local_days([end]), [dt.date(2026, 3, 21)])
+
+    def test_hours_grid_follows_daylight_saving_change(self):
+        tz = scraper.ZoneInfo("Pacific/Auckland")
+        # Clocks go back an hour at 03:00 on Sunday 5 April 2026, so this night lasts nine hours
+        start = dt.datetime(2026, 4, 4, 21, 0, tzinfo=tz).timestamp()
+        end = dt.datetime(2026, 4, 5, 7, 0, tzinfo=tz).timestamp()
+        grid = scraper.HoursGrid.covering(start, end, tz, dt.time(5, 0))
+        self.assertEqual(end - start, 11 * 3600)
+        self.assertEqual(grid.night_weekend_minutes([start], [end]), ([9 * 60], [11 * 60]))
+
+    def test_hours_store_keeps_history_across_runs(self):
+        import tempfile
+        shifts = scraper.build_shift_events(self.payload)
+        week = dt.datetime(2026, 3, 16, 5, 0, tzinfo=scraper.ZoneInfo("Pacific/Auckland"))
+        store = scraper.HoursStore("company-123")
+        store.record_window(shifts, week, week + dt.timedelta(weeks=2))
+        self.assertEqual(len(store.weeks[week.isoformat()]), len(shifts))
+        self.assertEqual(store.weeks[(week + dt.timedelta(weeks=1)).isoformat()], [])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "hours.json"
+            store.save(path)
+            reloaded = scraper.HoursStore.load(path, "company-123")
+            self.assertEqual(reloaded.weeks, store.weeks)
+            self.assertEqual(scraper.HoursStore.load(path, "other-company").weeks, {})
+        # A later run whose window starts a week on still reports the stored week
+        reloaded.record_window([], week + dt.timedelta(weeks=1), week + dt.timedelta(weeks=3))
+        reloaded.retain(week - dt.timedelta(weeks=52), week + dt.timedelta(weeks=3))
+        hours = scraper.aggregate_hours(reloaded.columns(), self.preferences)
+        self.assertEqual(hours.total.shifts, len(shifts))
+        reloaded.retain(week + dt.timedelta(weeks=1), week + dt.timedelta(weeks=3))
+        self.assertNotIn(week.isoformat(), reloaded.weeks)
+
+    def test_renders_hours_report(self):
+        columns = scraper.ShiftColumns.from_shifts(scraper.build_shift_events(self.payload))
+        report = scraper.render_hours_report(columns, self.preferences)
+        self.assertTrue(report.startswith("Rostered hours for all staff, 16/03/2026 to 18/03/2026 (Pacific/Auckland)\n"))
+        self.assertIn("Week of Mon 16/03/2026:", report)
+        self.assertIn("March 2026:", report)
+        self.assertIn("FOH: ", report)
+        self.assertIn("By staff:\nAlex Worker: 1 shift(s)", report)
+        self.assertIn(
+            "Cristian Rus: 2 shift(s), 7.00h rostered, 6.50h after breaks, 4.00h night, 0.00h weekend", report
+        )
+        empty = scraper.ShiftColumns.from_rows([])
+        self.assertTrue(scraper.render_hours_report(empty, self.preferences).endswith("No rostered hours found.\n"))
+
+
+class LeaveTests(unittest.TestCase):
+    def setUp(self):
+        self.payload = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+        self.payload["leaveRequests"] = [
+            {"id": "leave-1", "staffMemberId": "staff-cristian", "startDate": "2026-03-18", "endDate": "2026-03-18",
+             "status": "Approved", "leaveType": "Annual Leave"},
+            {"id": "leave-2", "staffMemberId": "staff-other", "startTime": "2026-03-18T18:00:00+13:00",
+             "endTime": "2026-03-19T09:00:00+13:00", "leaveType": "Sick Leave"},
+            {"id": "leave-3", "staffMemberId": "staff-mate", "startDate": "2026-03-18", "endDate": "2026-03-20",
+             "status": "Pending", "leaveType": "Annual Leave"},
+        ]
+        self.shifts = scraper.extract_employee_shifts(self.payload, "Cristian Rus")
+        self.evening = next(shift for shift in self.shifts if shift.shift_id == "shift-002")
+        self.overnight = next(shift for shift in self.shifts if shift.shift_id == "shift-001")
+        self.index = scraper.build_leave_index(self.payload, scraper.ZoneInfo("Pacific/Auckland"))
+
+    def test_interval_index_finds_overlaps_only(self):
+        index = scraper.IntervalIndex([
+            scraper.LeaveInterval(0, 100, "a", "A"),
+            scraper.LeaveInterval(10, 20, "b", "B"),
+            scraper.LeaveInterval(30, 40, "c", "C"),
+        ])
+        self.assertEqual([item.staff_id for item in index.overlapping(15, 35)], ["a", "b", "c"])
+        self.assertEqual([item.staff_id for item in index.overlapping(20, 30)], ["a"])
+        self.assertEqual(index.overlapping(100, 200), [])
+
+    def test_interval_index_prunes_past_one_long_interval(self):
+        intervals = [scraper.LeaveInterval(0, 1_000_000, "long", "Long")]
+        intervals += [scraper.LeaveInterval(10 * i, 10 * i + 5, f"s{i}", "Short") for i in range(1, 20_000)]
+        index = scraper.IntervalIndex(intervals)
+
+        class CountingList(list):
+            reads = 0
+
+            def __getitem__(self, position):
+                CountingList.reads += 1
+                return super().__getitem__(position)
+
+        index.max_ends = CountingList(index.max_ends)
+        found = index.overlapping(150_002, 150_004)
+        self.assertEqual([item.staff_id for item in found], ["long", "s15000"])
+        # Only subtree maxima along a couple of root-to-leaf paths are read, not the 20k intervals
+        self.assertLess(CountingList.reads, 100)
+        brute = [item for item in index.intervals if item.start < 90_003 and item.end > 89_991]
+        self.assertEqual(index.overlapping(89_991, 90_003), brute)
+
+    def test_date_only_leave_follows_company_timezone(self):
+        self.payload["leaveRequests"] = [
+            {"id": "leave-4", "staffMemberId": "staff-cristian", "startDate": "2026-03-17", "endDate": "2026-03-17",
+             "status": "Approved", "leaveType": "Annual Leave"},
+        ]
+        auckland = scraper.build_leave_index(self.payload, scraper.ZoneInfo("Pacific/Auckland"))
+        self.assertEqual(scraper.leave_notes(auckland, self.overnight).own, ("Annual Leave",))
+        utc = scraper.build_leave_index(self.payload, dt.timezone.utc)
+        self.assertEqual(scraper.leave_notes(utc, self.overnight).own, ())
+
+    def test_leave_of_staff_outside_coworker_roles_is_hidden(self):
+        self.payload["leaveRequests"].append(
+            {"id": "leave-5", "staffMemberId": "staff-kitchen", "startTime": "2026-03-18T16:00:00+13:00",
+             "endTime": "2026-03-18T21:00:00+13:00", "status": "Approved", "leaveType": "Sick Leave"}
+        )
+        tz = scraper.ZoneInfo("Pacific/Auckland")
+        notes = scraper.leave_notes(scraper.build_leave_index(self.payload, tz), self.evening)
+        self.assertEqual(notes.others, (("Someone Else", "Sick Leave"),))
+        kitchen = scraper.build_role_index(self.payload, frozenset({"kitchen"}))
+        notes = scraper.leave_notes(scraper.build_leave_index(self.payload, tz, kitchen), self.evening)
+        self.assertEqual(notes.others, (("Pat Cook", "Sick Leave"),))
+
+    def test_leave_notes_for_shift_owner_and_other_staff(self):
+        notes = scraper.leave_notes(self.index, self.evening)
+        self.assertEqual(notes.own, ("Annual Leave",))
+        self.assertEqual(notes.others, (("Someone Else", "Sick Leave"),))
+        self.assertEqual(scraper.leave_notes(self.index, self.overnight), scraper.LeaveNotes())
+
+    def test_leave_appears_in_calendar_and_summary(self):
+        calendar_text = scraper.render_calendar(
+            self.shifts, "Chou Chou", self.payload, "staff-cristian",
+            generated_at=dt.datetime(2026, 3, 9, tzinfo=dt.timezone.utc),
+            leave_index=self.index,
+        )
+        unfolded = calendar_text.replace("\r\n ", "")
+        self.assertIn("On approved leave: Annual Leave", unfolded)
+        self.assertIn("Staff on leave:\\n- Someone Else — Sick Leave", unfolded)
+        self.assertNotIn("Alex Worker — Annual Leave", unfolded)
+        summary = scraper.render_summary(self.shifts, "Chou Chou", self.index)
+        self.assertEqual(summary.count("Approved leave: Annual Leave"), 1)
+
+
+class FeedExportTests(unittest.TestCase):
+    def setUp(self):
+        self.payload = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+        self.shifts = scraper.extract_employee_shifts(self.payload, "Cristian Rus")
+        self.overlap = scraper.build_coworker_overlap(self.payload)
+        self.window_start = dt.datetime(2026, 3, 16, 5, 0, tzinfo=dt.timezone(dt.timedelta(hours=13)))
+
+    def _stream(self, writer):
+        writer.begin()
+        for shift in self.shifts:
+            writer.write(shift, self.overlap.coworkers_by_shift.get(shift.shift_id, []))
+        writer.end()
+
+    def test_json_feed_is_valid_document(self):
+        buffer = io.StringIO()
+        self._stream(scraper.JsonFeedWriter(buffer, "Chou Chou", self.window_start))
+        feed = json.loads(buffer.getvalue())
+        self.assertEqual(feed["company"], "Chou Chou")
+        self.assertEqual([shift["id"] for shift in feed["shifts"]], ["shift-001", "shift-002"])
+        self.assertEqual(feed["shifts"][1]["workingWith"], [{"name": "Alex Worker", "roleName": "FOH"}])
+        self.assertEqual(feed["shifts"][1]["breakMinutes"], 30)
+
+    def test_json_feed_with_no_shifts(self):
+        buffer = io.StringIO()
+        writer = scraper.JsonFeedWriter(buffer, "Chou Chou", self.window_start)
+        writer.begin()
+        writer.end()
+        self.assertEqual(json.loads(buffer.getvalue())["shifts"], [])
+
+    def test_csv_feed_has_one_row_per_shift(self):
+        buffer = io.StringIO()
+        self._stream(scraper.CsvFeedWriter(buffer))
+        rows = list(csv.DictReader(io.StringIO(buffer.getvalue())))
+        self.assertEqual([row["id"] for row in rows], ["shift-001", "shift-002"])
+        self.assertEqual(rows[1]["jobs"], "Floor; Close")
+        self.assertEqual(rows[1]["workingWith"], "Alex Worker (FOH)")
+
+    def test_export_formats_from_environment(self):
+        with mock.patch.dict(os.environ, {"ROSTER_EXPORT_FORMATS": "ics, JSON"}):
+            self.assertEqual(scraper.load_export_formats(), frozenset({"ics", "json"}))
+        with mock.patch.dict(os.environ, {"ROSTER_EXPORT_FORMATS": "xml"}):
+            with self.assertRaises(scraper.ScraperError):
+                scraper.load_export_formats()
+
+
+class OutputSinkTests(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_write_outputs_skips_unchanged_files(self):
+        sinks = [scraper.FileSink(self.root)]
+        first = scraper.write_outputs("BEGIN:VCALENDAR\r\n", "summary\n", "hours\n", sinks=sinks)
+        self.assertEqual(first, 6)
+        self.assertEqual((self.root / "public" / "roster.ics").read_bytes(), b"BEGIN:VCALENDAR\r\n")
+        self.assertEqual((self.root / "public" / ".nojekyll").read_bytes(), b"")
+        self.assertEqual(scraper.write_outputs("BEGIN:VCALENDAR\r\n", "summary\n", "hours\n", sinks=sinks), 0)
+        self.assertEqual(scraper.write_outputs("BEGIN:VCALENDAR\r\n", "changed\n", "hours\n", sinks=sinks), 1)
+
+    def test_index_links_only_published_formats(self):
+        sinks = [scraper.FileSink(self.root)]
+        scraper.write_outputs(None, "summary\n", "hours\n", {scraper.PUBLIC_JSON_PATH: "{}"}, sinks)
+        index = (self.root / "public" / "index.html").read_text(encoding="utf-8")
+        self.assertIn('href="roster.json"', index)
+        self.assertNotIn('href="roster.ics"', index)
+        self.assertNotIn('href="roster.csv"', index)
+
+    def test_gzip_and_employee_tree_sinks(self):
+        import gzip
+        outputs = {Path("roster.ics"): "calendar", Path("public/roster.ics"): "calendar"}
+        gzip_sink = scraper.GzipSink(self.root / "gz")
+        tree_sink = scraper.EmployeeTreeSink(self.root / "tree", "Cristian Rus")
+        self.assertEqual(scraper.write_to_sinks(outputs, [gzip_sink, tree_sink]), 4)
+        self.assertEqual(gzip.decompress((self.root / "gz" / "public" / "roster.ics.gz").read_bytes()), b"calendar")
+        self.assertEqual((self.root / "tree" / "cristian-rus" / "roster.ics").read_text(), "calendar")
+        self.assertEqual(scraper.write_to_sinks(outputs, [gzip_sink, tree_sink]), 0)
+
+    def test_archive_sink_prefers_employee_tree_and_needs_a_readable_file(self):
+        local = scraper.FileSink(self.root)
+        tree = scraper.EmployeeTreeSink(self.root / "tree", "Cristian Rus")
+        gzip_sink = scraper.GzipSink(self.root / "gz")
+        self.assertIs(scraper.archive_sink([local, gzip_sink, tree]), tree)
+        self.assertIs(scraper.archive_sink([gzip_sink, local]), local)
+        self.assertIsNone(scraper.archive_sink([gzip_sink, scraper.StdoutSink(io.StringIO())]))
+
+    def test_past_events_survive_rerender_through_employee_sink(self):
+        payload = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+        shifts = scraper.extract_employee_shifts(payload, "Cristian Rus")
+        sinks = [scraper.EmployeeTreeSink(self.root / "rosters", "Cristian Rus")]
+        archive_path = scraper.archive_sink(sinks).target(scraper.PUBLIC_OUTPUT_PATH)
+        generated_at = dt.datetime(2026, 3, 9, tzinfo=dt.timezone.utc)
+        for window in (shifts, [shift for shift in shifts if shift.shift_id == "shift-002"]):
+            calendar_text = scraper.render_calendar(
+                window, "Chou Chou", payload, "staff-cristian", generated_at=generated_at, existing_path=archive_path
+            )
+            scraper.write_outputs(calendar_text, "summary\n", "hours\n", sinks=sinks)
+        archived = archive_path.read_text(encoding="utf-8")
+        self.assertEqual(archive_path, self.root / "rosters" / "cristian-rus" / "public" / "roster.ics")
+        self.assertIn("Shift ID: shift-001", archived)
+        self.assertIn("Shift ID: shift-002", archived)
+        self.assertFalse((self.root / "public" / "roster.ics").exists())
+
+    def test_stdout_sink_prints_shared_content_once(self):
+        buffer = io.StringIO()
+        outputs = {Path("roster.ics"): "calendar\n", Path("public/roster.ics"): "calendar\n"}
+        self.assertEqual(scraper.write_to_sinks(outputs, [scraper.StdoutSink(buffer)]), 0)
+        self.assertEqual(buffer.getvalue(), "==> roster.ics, public/roster.ics <==\ncalendar\n")
+
+    def test_status_lines_move_to_stderr_with_stdout_sink(self):
+        self.assertIs(scraper.status_stream([scraper.FileSink(self.root)]), sys.stdout)
+        self.assertIs(scraper.status_stream([scraper.FileSink(self.root), scraper.StdoutSink()]), sys.stderr)
+
+    def test_overlap_exports_skip_unchanged_files(self):
+        payload = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+        overlap = scraper.build_coworker_overlap(payload)
+        directory = self.root / "overlap"
+        self.assertEqual(scraper.write_overlap_exports(overlap, directory), 2)
+        self.assertTrue((directory / scraper.OVERLAP_CSV_NAME).read_text(encoding="utf-8").startswith("staffId,"))
+        self.assertEqual(scraper.write_overlap_exports(overlap, directory), 0)
+
+    def test_output_sinks_from_environment(self):
+        with mock.patch.dict(os.environ, {"ROSTER_OUTPUT_SINKS": "local,gzip:dist,employee:rosters,stdout"}):
+            sinks = scraper.load_output_sinks("Cristian Rus")
+        self.assertEqual(
+            [type(sink).__name__ for sink in sinks], ["FileSink", "GzipSink", "EmployeeTreeSink", "StdoutSink"]
+        )
+        self.assertEqual(sinks[2].root, Path("rosters") / "cristian-rus")
+        with mock.patch.dict(os.environ, {"ROSTER_OUTPUT_SINKS": "ftp:host"}):
+            with self.assertRaises(scraper.ScraperError):
+                scraper.load_output_sinks("Cristian Rus")
+
+
 class CalendarRenderingTests(unittest.TestCase):
     def setUp(self):
         self.payload = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
@@ -198,6 +731,81 @@ class CalendarRenderingTests(unittest.TestCase):
         finally:
             os.unlink(tmp)
 
+    def test_render_cache_reuses_unchanged_shifts_byte_identically(self):
+        import tempfile
+        uncached = scraper.render_calendar(
+            self.shifts, "Chou Chou", self.payload, self.employee_id, generated_at=self.generated_at
+        )
+        cache = scraper.RenderCache()
+        first = scraper.render_calendar(
+            self.shifts, "Chou Chou", self.payload, self.employee_id, generated_at=self.generated_at, cache=cache
+        )
+        self.assertEqual(first, uncached)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = scraper.Path(tmp) / "cache.json"
+            cache.save(path)
+            reloaded = scraper.RenderCache.load(path)
+        second = scraper.render_calendar(
+            self.shifts, "Chou Chou", self.payload, self.employee_id, generated_at=self.generated_at, cache=reloaded
+        )
+        self.assertEqual(second, uncached)
+        self.assertEqual((reloaded.hits, reloaded.misses), (2, 0))
+
+    def test_render_cache_misses_when_dtstamp_changes(self):
+        cache = scraper.RenderCache()
+        scraper.render_calendar(
+            self.shifts, "Chou Chou", self.payload, self.employee_id, generated_at=self.generated_at, cache=cache
+        )
+        later = self.generated_at + dt.timedelta(days=7)
+        text = scraper.render_calendar(
+            self.shifts, "Chou Chou", self.payload, self.employee_id, generated_at=later, cache=cache
+        )
+        self.assertEqual(cache.misses, 4)
+        self.assertIn(f"DTSTAMP:{scraper.format_utc_timestamp(later)}", text)
+
+    def test_fold_ical_line_splits_at_75_octets(self):
+        ascii_line = "DESCRIPTION:" + "x" * 150
+        self.assertEqual([len(part) for part in scraper.fold_ical_line(ascii_line).split("\r\n ")], [75, 75, 12])
+        unicode_line = "DESCRIPTION:" + "—" * 40
+        for part in scraper.fold_ical_line(unicode_line).split("\r\n "):
+            self.assertLessEqual(len(part.encode("utf-8")), 75)
+
+    def test_event_template_matches_untemplated_render(self):
+        template = scraper.build_event_template("Chou Chou", self.generated_at)
+        shift = self.shifts[0]
+        self.assertEqual(
+            scraper.render_event(shift, self.generated_at, "Chou Chou", self.payload, self.employee_id, template=template),
+            scraper.render_event(shift, self.generated_at, "Chou Chou", self.payload, self.employee_id),
+        )
+        self.assertEqual(
+            scraper.render_travel_event(shift, self.generated_at, "Chou Chou", template),
+            scraper.render_travel_event(shift, self.generated_at, "Chou Chou"),
+        )
+
+    def test_event_archive_round_trips_archived_events(self):
+        import tempfile
+        first = scraper.render_calendar(
+            self.shifts, "Chou Chou", self.payload, self.employee_id, generated_at=self.generated_at
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = scraper.Path(tmp) / "roster.ics"
+            path.write_text(first, encoding="utf-8", newline="")
+            archive = scraper.EventArchive.load(path)
+            self.assertEqual(len(archive), 4)
+            uid = scraper.make_uid(self.shifts[0])
+            self.assertEqual(archive.dtstart(uid), "20260316T090000Z")
+            self.assertIn(archive.event_text(uid) + "\r\n", first)
+            self.assertEqual(scraper.load_existing_events(path)[uid], archive.event_text(uid).split("\r\n"))
+            again = scraper.render_calendar(
+                [], "Chou Chou", {}, "", generated_at=self.generated_at, existing_path=path
+            )
+        self.assertEqual(again, first)
+
+    def test_shift_event_has_no_instance_dict(self):
+        self.assertFalse(hasattr(self.shifts[0], "__dict__"))
+
     def test_escapes_text(self):
         escaped = scraper.escape_ical_text("Hello, world;\nLine 2")
         self.assertEqual(escaped, "Hello\\, world\\;\\nLine 2")